@@ -9,7 +9,15 @@ ESTACION = 2  # transitable
 
 Celda = Tuple[int, int]
 
-def a_estrella(grid: np.ndarray, inicio: Celda, meta: Celda) -> Optional[List[Celda]]:
+_VECINOS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+def mascara_transitable(grid: np.ndarray) -> np.ndarray:
+    """
+    Máscara uint8 (1 = transitable) para LIBRE/ESTACION; se calcula una vez por grid.
+    """
+    return ((grid == LIBRE) | (grid == ESTACION)).astype(np.uint8)
+
+def a_estrella(passable: np.ndarray, inicio: Celda, meta: Celda) -> Optional[List[Celda]]:
     """
     Algoritmo A* sobre un grid 4-conectado (arriba/abajo/izquierda/derecha).
 
@@ -17,69 +25,249 @@ def a_estrella(grid: np.ndarray, inicio: Celda, meta: Celda) -> Optional[List[Ce
       - Una ruta (lista de celdas) que incluye inicio y meta, o
       - None si la meta no es alcanzable.
 
-    Convención del grid:
-      - LIBRE (=0) y ESTACION (=2) son transitables.
-      - Cualquier otro valor se considera obstáculo.
+    passable es la máscara de mascara_transitable(grid): distinto de 0 = transitable.
     """
-    alto, ancho = grid.shape
+    alto, ancho = passable.shape
+    ix, iy = inicio
+    mx, my = meta
+
+    # Validación rápida
+    if not (0 <= ix < ancho and 0 <= iy < alto and 0 <= mx < ancho and 0 <= my < alto):
+        return None
+    if passable[iy, ix] == 0 or passable[my, mx] == 0:
+        return None
+    if ix == mx and iy == my:
+        return [(ix, iy)]
+
+    # heap de llaves int empacadas: (f << 2b) | (g << b) | nodo, con nodo = x*alto + y.
+    # Ordenar por la llave equivale a ordenar la tupla (f, g, (x, y)).
+    bits = (alto * ancho).bit_length()
+    mascara = (1 << bits) - 1
+    desp_f = 2 * bits
+
+    inicio_id = ix * alto + iy
+    meta_id = mx * alto + my
+
+    # Locales: evitan búsquedas de atributo y closures en el ciclo interno
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+
+    # Heurística: distancia Manhattan
+    abiertos: List[int] = [((abs(ix - mx) + abs(iy - my)) << desp_f) | inicio_id]
 
-    def en_rango(x: int, y: int) -> bool:
-        return 0 <= x < ancho and 0 <= y < alto
+    # costo_g < 0 marca un nodo cerrado (sustituye al set de cerrados): con heurística
+    # consistente un nodo cerrado nunca mejora, y nuevo_g >= 0 nunca es < -1.
+    vino_de: Dict[int, int] = {}
+    costo_g: Dict[int, int] = {inicio_id: 0}
+
+    while abiertos:
+        llave = heappop(abiertos)
+        actual = llave & mascara
+        g_actual = (llave >> bits) & mascara
+
+        if costo_g[actual] < 0:
+            continue
+        costo_g[actual] = -1
+
+        if actual == meta_id:
+            # Reconstrucción de ruta
+            ruta = [(mx, my)]
+            while actual in vino_de:
+                actual = vino_de[actual]
+                ruta.append(divmod(actual, alto))
+            ruta.reverse()
+            return ruta
+
+        x, y = divmod(actual, alto)
+        nuevo_g = g_actual + 1
+        for dx, dy in _VECINOS:
+            nx, ny = x + dx, y + dy
+
+            if not (0 <= nx < ancho and 0 <= ny < alto) or passable[ny, nx] == 0:
+                continue
 
-    def transitable(x: int, y: int) -> bool:
-        return grid[y, x] in (LIBRE, ESTACION)
+            vecino = nx * alto + ny
+            if nuevo_g < costo_g.get(vecino, 10**9):
+                costo_g[vecino] = nuevo_g
+                vino_de[vecino] = actual
+                f = nuevo_g + abs(nx - mx) + abs(ny - my)
+                heappush(abiertos, (f << desp_f) | (nuevo_g << bits) | vecino)
 
+    return None
+
+# Jump Point Search (JPS) 4-conectado
+
+def _desplazar(a: np.ndarray, dy: int, dx: int) -> np.ndarray:
+    """b[y, x] = a[y + dy, x + dx]; fuera del arreglo se considera False."""
+    alto, ancho = a.shape
+    b = np.zeros_like(a)
+    b[max(0, -dy):alto - max(0, dy), max(0, -dx):ancho - max(0, dx)] = \
+        a[max(0, dy):alto - max(0, -dy), max(0, dx):ancho - max(0, -dx)]
+    return b
+
+def _siguiente_evento(evento: np.ndarray, sentido: int) -> np.ndarray:
+    """
+    Para cada celda, fila del primer evento estrictamente más allá de ella sobre
+    su columna (sentido +1 = hacia abajo, -1 = hacia arriba).
+    """
+    n = evento.shape[0]
+    filas = np.arange(n)[:, None]
+    sig = np.empty(evento.shape, dtype=np.int64)
+    if sentido > 0:
+        cand = np.where(evento, filas, n - 1)
+        acum = np.minimum.accumulate(cand[::-1], axis=0)[::-1]
+        sig[:-1] = acum[1:]
+        sig[-1] = n - 1
+    else:
+        cand = np.where(evento, filas, 0)
+        acum = np.maximum.accumulate(cand, axis=0)
+        sig[1:] = acum[:-1]
+        sig[0] = 0
+    return sig
+
+def tablas_jps(passable: np.ndarray):
+    """
+    Tablas de salto independientes de la meta, en coordenadas con un borde
+    virtual de obstáculos (x+1, y+1):
+      - sig_v[dy][y, x]: primera fila, en sentido dy, con obstáculo o con vecino
+        lateral forzado (el lateral es transitable pero el de la fila anterior no).
+      - sig_h[dx][y, x]: primera columna, en sentido dx, con obstáculo o desde la
+        que un salto vertical encuentra un punto de salto.
+    """
+    P = np.pad(passable != 0, 1)
+    cols = np.arange(P.shape[1])[None, :]
+
+    izq = _desplazar(P, 0, -1)
+    der = _desplazar(P, 0, 1)
+    sig_v = {}
+    salto_v = {}
+    for dy in (1, -1):
+        forzada = P & ((izq & ~_desplazar(P, -dy, -1)) | (der & ~_desplazar(P, -dy, 1)))
+        sig_v[dy] = _siguiente_evento(~P | forzada, dy)
+        salto_v[dy] = P[sig_v[dy], cols]
+
+    con_salto_v = P & (salto_v[1] | salto_v[-1])
+    sig_h = {dx: _siguiente_evento((~P | con_salto_v).T, dx).T for dx in (1, -1)}
+    return P, sig_v, sig_h
+
+def _meta_en_columna(sig_v, x: int, y: int, dy: int, px: int, py: int) -> bool:
+    """True si avanzando desde (x, y) en sentido dy se llega a la meta sin obstáculos."""
+    if x != px or (py - y) * dy <= 0:
+        return False
+    return (py - sig_v[dy][y, x]) * dy <= 0
+
+def _saltar_vertical(P, sig_v, x: int, y: int, dy: int, px: int, py: int) -> Optional[Celda]:
+    if _meta_en_columna(sig_v, x, y, dy, px, py):
+        return (x, py)
+    e = int(sig_v[dy][y, x])
+    return (x, e) if P[e, x] else None
+
+def _saltar_horizontal(P, sig_v, sig_h, x: int, y: int, dx: int, px: int, py: int) -> Optional[Celda]:
+    e = int(sig_h[dx][y, x])
+    # La columna de la meta es un punto de salto si la meta es visible en vertical
+    if (px - x) * dx > 0 and (px - e) * dx <= 0 and P[y, px]:
+        if y == py or _meta_en_columna(sig_v, px, y, 1 if py > y else -1, px, py):
+            return (px, y)
+    return (e, y) if P[y, e] else None
+
+def a_estrella_jps(
+    passable: np.ndarray,
+    inicio: Celda,
+    meta: Celda,
+    tablas=None,
+) -> Optional[List[Celda]]:
+    """
+    Jump Point Search sobre el grid 4-conectado: rutas de la misma longitud que
+    a_estrella (óptimas), pero solo los puntos de salto entran al heap.
+
+    Orden canónico: primero horizontal, luego vertical. Un tramo vertical se
+    detiene donde aparece un vecino lateral forzado; uno horizontal, donde un
+    salto vertical encontraría un punto de salto. Ambos saltos son O(1) con las
+    tablas de tablas_jps, que dependen solo del grid: si se planean muchas rutas
+    conviene calcularlas una vez y pasarlas en tablas (si no, se calculan aquí).
+
+    Mismo contrato que a_estrella (puede elegir otra ruta entre las de igual costo).
+    """
+    alto, ancho = passable.shape
     ix, iy = inicio
     mx, my = meta
 
     # Validación rápida
-    if (
-        (not en_rango(ix, iy))
-        or (not en_rango(mx, my))
-        or (not transitable(ix, iy))
-        or (not transitable(mx, my))
-    ):
+    if not (0 <= ix < ancho and 0 <= iy < alto and 0 <= mx < ancho and 0 <= my < alto):
+        return None
+    if passable[iy, ix] == 0 or passable[my, mx] == 0:
         return None
 
-    def heuristica(x: int, y: int) -> int:
-        # Distancia Manhattan
-        return abs(x - mx) + abs(y - my)
+    P, sig_v, sig_h = tablas if tablas is not None else tablas_jps(passable)
+    alto_p = alto + 2
+    px, py = mx + 1, my + 1
+
+    bits = ((alto + 2) * (ancho + 2)).bit_length()
+    mascara = (1 << bits) - 1
+    desp_f = 2 * bits
 
-    # heap: (f = g + h, g, (x,y))
-    abiertos: List[Tuple[int, int, Celda]] = []
-    heapq.heappush(abiertos, (heuristica(ix, iy), 0, (ix, iy)))
+    inicio_id = (ix + 1) * alto_p + (iy + 1)
+    meta_id = px * alto_p + py
 
-    vino_de: Dict[Celda, Celda] = {}
-    costo_g: Dict[Celda, int] = {(ix, iy): 0}
+    abiertos: List[int] = [((abs(ix - mx) + abs(iy - my)) << desp_f) | inicio_id]
+    vino_de: Dict[int, int] = {}
+    costo_g: Dict[int, int] = {inicio_id: 0}
+    direccion: Dict[int, Tuple[int, int]] = {inicio_id: (0, 0)}
     cerrados = set()
 
     while abiertos:
-        _, g_actual, actual = heapq.heappop(abiertos)
+        llave = heapq.heappop(abiertos)
+        actual = llave & mascara
+        g_actual = (llave >> bits) & mascara
 
         if actual in cerrados:
             continue
         cerrados.add(actual)
 
-        if actual == (mx, my):
-            # Reconstrucción de ruta
-            ruta = [actual]
+        if actual == meta_id:
+            # Reconstrucción: unir puntos de salto con tramos rectos
+            puntos = [divmod(actual, alto_p)]
             while actual in vino_de:
                 actual = vino_de[actual]
-                ruta.append(actual)
-            ruta.reverse()
+                puntos.append(divmod(actual, alto_p))
+            puntos.reverse()
+
+            ruta = [(puntos[0][0] - 1, puntos[0][1] - 1)]
+            for (x0, y0), (x1, y1) in zip(puntos, puntos[1:]):
+                sx = (x1 > x0) - (x1 < x0)
+                sy = (y1 > y0) - (y1 < y0)
+                for k in range(1, abs(x1 - x0) + abs(y1 - y0) + 1):
+                    ruta.append((x0 + sx * k - 1, y0 + sy * k - 1))
             return ruta
 
-        x, y = actual
-        for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
-            nx, ny = x + dx, y + dy
+        x, y = divmod(actual, alto_p)
+        dx, dy = direccion[actual]
 
-            if (not en_rango(nx, ny)) or (not transitable(nx, ny)):
-                continue
+        saltos: List[Tuple[Optional[Celda], Tuple[int, int]]] = []
+        if dy == 0:
+            # Inicio o llegada horizontal: seguir de frente y abrir ambos sentidos verticales
+            for sx in ((1, -1) if dx == 0 else (dx,)):
+                saltos.append((_saltar_horizontal(P, sig_v, sig_h, x, y, sx, px, py), (sx, 0)))
+            for sy in (1, -1):
+                saltos.append((_saltar_vertical(P, sig_v, x, y, sy, px, py), (0, sy)))
+        else:
+            # Llegada vertical: seguir de frente y solo los laterales forzados
+            saltos.append((_saltar_vertical(P, sig_v, x, y, dy, px, py), (0, dy)))
+            for sx in (1, -1):
+                if P[y, x + sx] and not P[y - dy, x + sx]:
+                    saltos.append((_saltar_horizontal(P, sig_v, sig_h, x, y, sx, px, py), (sx, 0)))
 
-            nuevo_g = g_actual + 1
-            if nuevo_g < costo_g.get((nx, ny), 10**9):
-                costo_g[(nx, ny)] = nuevo_g
-                vino_de[(nx, ny)] = (x, y)
-                heapq.heappush(abiertos, (nuevo_g + heuristica(nx, ny), nuevo_g, (nx, ny)))
+        for punto, d in saltos:
+            if punto is None:
+                continue
+            nx, ny = punto
+            vecino = nx * alto_p + ny
+            nuevo_g = g_actual + abs(nx - x) + abs(ny - y)
+            if nuevo_g < costo_g.get(vecino, 10**9):
+                costo_g[vecino] = nuevo_g
+                vino_de[vecino] = actual
+                direccion[vecino] = d
+                f = nuevo_g + abs(nx - px) + abs(ny - py)
+                heapq.heappush(abiertos, (f << desp_f) | (nuevo_g << bits) | vecino)
 
     return None
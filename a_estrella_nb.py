@@ -0,0 +1,847 @@
+#!/usr/bin/env python3
+# A* compilado con Numba: mismo contrato que a_estrella.a_estrella
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from a_estrella import a_estrella, a_estrella_jps, tablas_jps
+
+try:
+    from numba import get_num_threads, njit, prange
+    NUMBA_DISPONIBLE = True
+except ImportError:
+    prange = range
+    NUMBA_DISPONIBLE = False
+
+Celda = Tuple[int, int]
+
+_INF = np.int32(np.iinfo(np.int32).max)
+
+def _sin_compilar(fn):
+    return fn
+
+# Decoradores compartidos por los módulos con núcleos opcionales de Numba
+# (sim_core, generador_layout): sin Numba dejan la función en Python puro
+compilar = njit(cache=True, fastmath=False) if NUMBA_DISPONIBLE else _sin_compilar
+compilar_paralelo = njit(cache=True, fastmath=False, parallel=True) if NUMBA_DISPONIBLE else _sin_compilar
+
+def empacar_transitable(passable: np.ndarray) -> np.ndarray:
+    """
+    Empaca la máscara transitable a 1 bit por celda (8 celdas por byte, por fila).
+    La celda (x, y) queda en el bit 7-(x&7) del byte [y, x>>3].
+    """
+    return np.packbits(np.asarray(passable) != 0, axis=1)
+
+def espacio_busqueda(alto: int, ancho: int, hilos: Optional[int] = None):
+    """
+    Búferes reutilizables de los núcleos de A*, una fila por hilo:
+    (g, parent, sello, generacion). Cada búsqueda estrena una generación y solo
+    confía en g/parent de las celdas cuyo sello es esa generación, así que los
+    arreglos no se reinician entre rutas y una ruta corta no paga el tamaño del grid.
+
+    hilos es por defecto el número de hilos de Numba: a_estrella_lote usa una fila
+    por hilo y las búsquedas sueltas la fila 0 (a_estrella_bidireccional, las filas
+    0 y 1). Para a_estrella_jps_nb el tamaño es el de las tablas de tablas_jps.
+    """
+    if hilos is None:
+        hilos = get_num_threads() if NUMBA_DISPONIBLE else 1
+    n = alto * ancho
+    return (
+        np.empty((hilos, n), np.int32),
+        np.empty((hilos, n), np.int32),
+        np.zeros((hilos, n), np.int32),
+        np.zeros(hilos, np.int64),
+    )
+
+@compilar
+def _nueva_generacion(sello, generacion, fila):
+    """Siguiente generación de la fila; al agotarse el rango int32 se limpian sus sellos."""
+    generacion[fila] += 1
+    if generacion[fila] >= _INF:
+        sello[fila, :] = 0
+        generacion[fila] = 1
+    return generacion[fila]
+
+@compilar
+def _heap_inicial(ancho, alto):
+    # Cota de la frontera del orden del perímetro del grid; si no alcanza, el heap crece
+    return np.empty(2 * (ancho + alto) + 1, np.int64)
+
+@compilar
+def _crecer_heap(heap, tam):
+    """Copia las tam entradas del heap a uno del doble de capacidad."""
+    nuevo = np.empty(2 * heap.shape[0], np.int64)
+    nuevo[:tam] = heap[:tam]
+    return nuevo
+
+@compilar
+def _transitable(passable_bits, x, y):
+    return (np.int64(passable_bits[y, x >> 3]) >> (7 - (x & 7))) & 1
+
+@compilar
+def _a_estrella_kernel(passable_bits, ancho, alto, ix, iy, mx, my, espacio, fila):
+    """
+    Núcleo de A* sobre arreglos planos indexados por y*ancho+x; la máscara
+    transitable llega empacada por bits (ver empacar_transitable). g y parent
+    viven en la fila indicada de espacio (ver espacio_busqueda).
+
+    La llave del heap empaca (f, g, x, y) en un int64 para conservar exactamente
+    el desempate de la versión con tuplas (menor f, luego menor g, luego x, luego y).
+
+    Regresa un arreglo int32 con los índices planos de la ruta (vacío si no hay ruta).
+    """
+    n = alto * ancho
+
+    bits = 1
+    while (1 << bits) <= n:
+        bits += 1
+    mascara = (1 << bits) - 1
+
+    g_todo, parent_todo, sello_todo, generacion = espacio
+    gen = _nueva_generacion(sello_todo, generacion, fila)
+    g = g_todo[fila]
+    parent = parent_todo[fila]
+    sello = sello_todo[fila]
+
+    heap = _heap_inicial(ancho, alto)
+
+    inicio = iy * ancho + ix
+    meta = my * ancho + mx
+    g[inicio] = 0
+    parent[inicio] = -1
+    sello[inicio] = gen
+
+    # push inicial
+    h0 = abs(ix - mx) + abs(iy - my)
+    heap[0] = (np.int64(h0) << (2 * bits)) | (np.int64(0) << bits) | np.int64(ix * alto + iy)
+    tam = 1
+
+    while tam > 0:
+        # heap_pop
+        llave = heap[0]
+        tam -= 1
+        ultimo = heap[tam]
+        i = 0
+        while True:
+            hijo = 2 * i + 1
+            if hijo >= tam:
+                break
+            if hijo + 1 < tam and heap[hijo + 1] < heap[hijo]:
+                hijo += 1
+            if heap[hijo] < ultimo:
+                heap[i] = heap[hijo]
+                i = hijo
+            else:
+                break
+        heap[i] = ultimo
+
+        orden = llave & mascara
+        g_actual = (llave >> bits) & mascara
+        x = orden // alto
+        y = orden % alto
+        actual = y * ancho + x
+
+        # Entrada vieja: con heurística consistente la primera salida de cada celda
+        # trae su g definitivo, y las demás traen uno mayor
+        if g_actual > g[actual]:
+            continue
+
+        if actual == meta:
+            largo = 1
+            c = actual
+            while parent[c] != -1:
+                c = parent[c]
+                largo += 1
+            ruta = np.empty(largo, np.int32)
+            c = actual
+            for k in range(largo - 1, -1, -1):
+                ruta[k] = c
+                c = parent[c]
+            return ruta
+
+        nuevo_g = g_actual + 1
+        for k in range(4):
+            if k == 0:
+                nx, ny = x + 1, y
+            elif k == 1:
+                nx, ny = x - 1, y
+            elif k == 2:
+                nx, ny = x, y + 1
+            else:
+                nx, ny = x, y - 1
+
+            if nx < 0 or nx >= ancho or ny < 0 or ny >= alto:
+                continue
+            if _transitable(passable_bits, nx, ny) == 0:
+                continue
+
+            vecino = ny * ancho + nx
+            if sello[vecino] != gen or nuevo_g < g[vecino]:
+                g[vecino] = nuevo_g
+                parent[vecino] = actual
+                sello[vecino] = gen
+                f = nuevo_g + abs(nx - mx) + abs(ny - my)
+
+                # heap_push
+                llave = (np.int64(f) << (2 * bits)) | (np.int64(nuevo_g) << bits) | np.int64(nx * alto + ny)
+                if tam == heap.shape[0]:
+                    heap = _crecer_heap(heap, tam)
+                j = tam
+                tam += 1
+                while j > 0:
+                    padre = (j - 1) >> 1
+                    if heap[padre] <= llave:
+                        break
+                    heap[j] = heap[padre]
+                    j = padre
+                heap[j] = llave
+
+    return np.empty(0, np.int32)
+
+def a_estrella_nb(
+    passable: np.ndarray,
+    inicio: Celda,
+    meta: Celda,
+    passable_bits: Optional[np.ndarray] = None,
+    espacio=None,
+) -> Optional[List[Celda]]:
+    """
+    Versión compilada de a_estrella (misma firma, misma ruta resultante).
+
+    passable_bits es la máscara ya empacada con empacar_transitable y espacio la
+    salida de espacio_busqueda; conviene pasarlos cuando se planean muchas rutas
+    sobre el mismo grid. Si Numba no está instalado se usa la implementación en
+    Python puro.
+    """
+    if not NUMBA_DISPONIBLE:
+        return a_estrella(passable, inicio, meta)
+
+    alto, ancho = passable.shape
+    ix, iy = inicio
+    mx, my = meta
+
+    # Validación rápida
+    if not (0 <= ix < ancho and 0 <= iy < alto and 0 <= mx < ancho and 0 <= my < alto):
+        return None
+    if passable[iy, ix] == 0 or passable[my, mx] == 0:
+        return None
+    if ix == mx and iy == my:
+        return [(ix, iy)]
+
+    if passable_bits is None:
+        passable_bits = empacar_transitable(passable)
+    if espacio is None:
+        espacio = espacio_busqueda(alto, ancho, 1)
+    indices = _a_estrella_kernel(passable_bits, ancho, alto, int(ix), int(iy), int(mx), int(my), espacio, 0)
+    if indices.size == 0:
+        return None
+    return [(i % ancho, i // ancho) for i in indices.tolist()]
+
+@compilar_paralelo
+def _a_estrella_lote_kernel(passable_bits, ancho, alto, inicios, metas, max_largo, espacio):
+    """
+    Resuelve N búsquedas independientes en paralelo: cada iteración de prange usa
+    su propia fila de espacio y resuelve las búsquedas h, h+hilos, h+2*hilos, ...
+
+    Las rutas se escriben en un búfer preasignado (N, max_largo) de índices planos.
+    largos[p] es 0 si no hay ruta y -1 si la ruta no cupo en el búfer.
+    """
+    n = inicios.shape[0]
+    hilos = min(espacio[0].shape[0], n)
+    rutas = np.empty((n, max_largo), np.int32)
+    largos = np.zeros(n, np.int32)
+    for h in prange(hilos):
+        for p in range(h, n, hilos):
+            ruta = _a_estrella_kernel(
+                passable_bits, ancho, alto, inicios[p, 0], inicios[p, 1], metas[p, 0], metas[p, 1], espacio, h
+            )
+            largo = ruta.size
+            if largo <= max_largo:
+                rutas[p, :largo] = ruta
+                largos[p] = largo
+            else:
+                largos[p] = -1
+    return rutas, largos
+
+def a_estrella_lote(
+    passable: np.ndarray,
+    inicios: Sequence[Celda],
+    metas: Sequence[Celda],
+    passable_bits: Optional[np.ndarray] = None,
+    espacio=None,
+) -> List[Optional[List[Celda]]]:
+    """
+    Planea varias rutas independientes de una sola vez; equivale a llamar
+    a_estrella_nb(passable, inicios[k], metas[k]) para cada k, pero las búsquedas
+    corren en paralelo entre núcleos (una fila de espacio por hilo).
+
+    Si Numba no está instalado se resuelven en serie con la implementación en Python.
+    """
+    if not NUMBA_DISPONIBLE:
+        return [a_estrella(passable, i, m) for i, m in zip(inicios, metas)]
+
+    alto, ancho = passable.shape
+    rutas: List[Optional[List[Celda]]] = [None] * len(inicios)
+
+    # Validación rápida: solo los pares válidos van al kernel
+    validos = []
+    for k, ((ix, iy), (mx, my)) in enumerate(zip(inicios, metas)):
+        if not (0 <= ix < ancho and 0 <= iy < alto and 0 <= mx < ancho and 0 <= my < alto):
+            continue
+        if passable[iy, ix] == 0 or passable[my, mx] == 0:
+            continue
+        validos.append(k)
+    if not validos:
+        return rutas
+
+    if passable_bits is None:
+        passable_bits = empacar_transitable(passable)
+    ini = np.array([inicios[k] for k in validos], dtype=np.int64).reshape(-1, 2)
+    fin = np.array([metas[k] for k in validos], dtype=np.int64).reshape(-1, 2)
+
+    # Cota holgada para rutas en pasillos; las que no caben se recalculan en serie
+    max_largo = 2 * (ancho + alto)
+    if espacio is None:
+        espacio = espacio_busqueda(alto, ancho)
+    buf, largos = _a_estrella_lote_kernel(passable_bits, ancho, alto, ini, fin, max_largo, espacio)
+
+    for j, k in enumerate(validos):
+        largo = int(largos[j])
+        if largo > 0:
+            rutas[k] = [(i % ancho, i // ancho) for i in buf[j, :largo].tolist()]
+        elif largo < 0:
+            rutas[k] = a_estrella_nb(passable, inicios[k], metas[k], passable_bits, espacio)
+    return rutas
+
+@compilar
+def _heap_push(heap, tam, llave):
+    """Regresa (heap, tam): el heap puede ser uno nuevo si hubo que crecerlo."""
+    if tam == heap.shape[0]:
+        heap = _crecer_heap(heap, tam)
+    j = tam
+    while j > 0:
+        padre = (j - 1) >> 1
+        if heap[padre] <= llave:
+            break
+        heap[j] = heap[padre]
+        j = padre
+    heap[j] = llave
+    return heap, tam + 1
+
+@compilar
+def _heap_pop(heap, tam):
+    llave = heap[0]
+    tam -= 1
+    ultimo = heap[tam]
+    i = 0
+    while True:
+        hijo = 2 * i + 1
+        if hijo >= tam:
+            break
+        if hijo + 1 < tam and heap[hijo + 1] < heap[hijo]:
+            hijo += 1
+        if heap[hijo] < ultimo:
+            heap[i] = heap[hijo]
+            i = hijo
+        else:
+            break
+    heap[i] = ultimo
+    return llave, tam
+
+@compilar
+def _a_estrella_bidireccional_kernel(passable_bits, ancho, alto, ix, iy, mx, my, espacio):
+    """
+    A* bidireccional: frente 0 desde el inicio (h = Manhattan a la meta) y
+    frente 1 desde la meta (h = Manhattan al inicio), en las filas 0 y 1 de
+    espacio. Se expande el frente con menos entradas; mu es el mejor costo de
+    encuentro conocido.
+
+    Se detiene cuando la f mínima de algún frente es >= mu: ningún camino más
+    corto puede pasar por ese frente. Regresa índices planos (y*ancho+x).
+    """
+    n = alto * ancho
+
+    bits = 1
+    while (1 << bits) <= n:
+        bits += 1
+    mascara = (1 << bits) - 1
+
+    inicio = iy * ancho + ix
+    meta = my * ancho + mx
+    if inicio == meta:
+        ruta = np.empty(1, np.int32)
+        ruta[0] = inicio
+        return ruta
+
+    g, parent, sello, generacion = espacio
+    gen = np.empty(2, np.int64)
+    gen[0] = _nueva_generacion(sello, generacion, 0)
+    gen[1] = _nueva_generacion(sello, generacion, 1)
+    heap0 = _heap_inicial(ancho, alto)
+    heap1 = _heap_inicial(ancho, alto)
+    tam = np.zeros(2, np.int64)
+
+    h0 = abs(ix - mx) + abs(iy - my)
+    g[0, inicio] = 0
+    g[1, meta] = 0
+    parent[0, inicio] = -1
+    parent[1, meta] = -1
+    sello[0, inicio] = gen[0]
+    sello[1, meta] = gen[1]
+    heap0[0] = (np.int64(h0) << (2 * bits)) | np.int64(inicio)
+    heap1[0] = (np.int64(h0) << (2 * bits)) | np.int64(meta)
+    tam[:] = 1
+
+    mu = np.int64(_INF)
+    encuentro = -1
+
+    while tam[0] > 0 and tam[1] > 0:
+        f0 = heap0[0] >> (2 * bits)
+        f1 = heap1[0] >> (2 * bits)
+        if max(f0, f1) >= mu:
+            break
+
+        lado = 0 if tam[0] <= tam[1] else 1
+        otro = 1 - lado
+        llave, tam[lado] = _heap_pop(heap0 if lado == 0 else heap1, tam[lado])
+
+        actual = llave & mascara
+        g_actual = (llave >> bits) & mascara
+        # Entrada vieja (ver _a_estrella_kernel)
+        if g_actual > g[lado, actual]:
+            continue
+
+        x = actual % ancho
+        y = actual // ancho
+        if lado == 0:
+            tx, ty = mx, my
+        else:
+            tx, ty = ix, iy
+
+        nuevo_g = g_actual + 1
+        for k in range(4):
+            if k == 0:
+                nx, ny = x + 1, y
+            elif k == 1:
+                nx, ny = x - 1, y
+            elif k == 2:
+                nx, ny = x, y + 1
+            else:
+                nx, ny = x, y - 1
+
+            if nx < 0 or nx >= ancho or ny < 0 or ny >= alto:
+                continue
+            if _transitable(passable_bits, nx, ny) == 0:
+                continue
+
+            vecino = ny * ancho + nx
+            if sello[lado, vecino] != gen[lado] or nuevo_g < g[lado, vecino]:
+                g[lado, vecino] = nuevo_g
+                parent[lado, vecino] = actual
+                sello[lado, vecino] = gen[lado]
+                f = nuevo_g + abs(nx - tx) + abs(ny - ty)
+                llave = (np.int64(f) << (2 * bits)) | (np.int64(nuevo_g) << bits) | np.int64(vecino)
+                if lado == 0:
+                    heap0, tam[0] = _heap_push(heap0, tam[0], llave)
+                else:
+                    heap1, tam[1] = _heap_push(heap1, tam[1], llave)
+
+            if sello[otro, vecino] == gen[otro]:
+                costo = np.int64(g[lado, vecino]) + np.int64(g[otro, vecino])
+                if costo < mu:
+                    mu = costo
+                    encuentro = vecino
+
+    if encuentro == -1:
+        return np.empty(0, np.int32)
+
+    # inicio -> encuentro (padres del frente 0) y encuentro -> meta (padres del frente 1)
+    largo_ida = 1
+    c = encuentro
+    while parent[0, c] != -1:
+        c = parent[0, c]
+        largo_ida += 1
+    largo = largo_ida
+    c = encuentro
+    while parent[1, c] != -1:
+        c = parent[1, c]
+        largo += 1
+
+    ruta = np.empty(largo, np.int32)
+    c = encuentro
+    for k in range(largo_ida - 1, -1, -1):
+        ruta[k] = c
+        c = parent[0, c]
+    c = encuentro
+    for k in range(largo_ida, largo):
+        c = parent[1, c]
+        ruta[k] = c
+    return ruta
+
+def a_estrella_bidireccional(
+    passable: np.ndarray,
+    inicio: Celda,
+    meta: Celda,
+    passable_bits: Optional[np.ndarray] = None,
+    espacio=None,
+) -> Optional[List[Celda]]:
+    """
+    A* bidireccional compilado: mismo contrato y misma longitud de ruta que
+    a_estrella (puede elegir otra ruta entre las de igual costo). passable_bits y
+    espacio funcionan igual que en a_estrella_nb; espacio necesita al menos dos filas.
+
+    Si Numba no está instalado se usa la implementación en Python puro.
+    """
+    if not NUMBA_DISPONIBLE:
+        return a_estrella(passable, inicio, meta)
+
+    alto, ancho = passable.shape
+    ix, iy = inicio
+    mx, my = meta
+
+    # Validación rápida
+    if not (0 <= ix < ancho and 0 <= iy < alto and 0 <= mx < ancho and 0 <= my < alto):
+        return None
+    if passable[iy, ix] == 0 or passable[my, mx] == 0:
+        return None
+
+    if passable_bits is None:
+        passable_bits = empacar_transitable(passable)
+    if espacio is None:
+        espacio = espacio_busqueda(alto, ancho, 2)
+    indices = _a_estrella_bidireccional_kernel(
+        passable_bits, ancho, alto, int(ix), int(iy), int(mx), int(my), espacio
+    )
+    if indices.size == 0:
+        return None
+    return [(i % ancho, i // ancho) for i in indices.tolist()]
+
+# Jump Point Search compilado: misma lógica y mismo desempate que a_estrella.a_estrella_jps
+
+@compilar
+def _meta_en_columna_jps(sig_v, x, y, dy, px, py):
+    if x != px or (py - y) * dy <= 0:
+        return False
+    return (py - sig_v[y, x]) * dy <= 0
+
+@compilar
+def _saltar_vertical_jps(P, sig_v, x, y, dy, px, py):
+    """Regresa (hay_punto, y_punto); el punto siempre queda en la columna x."""
+    if _meta_en_columna_jps(sig_v, x, y, dy, px, py):
+        return True, py
+    e = sig_v[y, x]
+    return P[e, x], e
+
+@compilar
+def _saltar_horizontal_jps(P, sv_abajo, sv_arriba, sig_h, x, y, dx, px, py):
+    """Regresa (hay_punto, x_punto); el punto siempre queda en la fila y."""
+    e = sig_h[y, x]
+    # La columna de la meta es un punto de salto si la meta es visible en vertical
+    if (px - x) * dx > 0 and (px - e) * dx <= 0 and P[y, px]:
+        if y == py:
+            return True, px
+        if py > y:
+            if _meta_en_columna_jps(sv_abajo, px, y, 1, px, py):
+                return True, px
+        elif _meta_en_columna_jps(sv_arriba, px, y, -1, px, py):
+            return True, px
+    return P[y, e], e
+
+@compilar
+def _a_estrella_jps_kernel(P, sv_abajo, sv_arriba, sh_der, sh_izq, ix, iy, mx, my, espacio):
+    """
+    Núcleo de a_estrella_jps sobre las tablas de tablas_jps (coordenadas con
+    borde virtual). Los nodos se identifican como x*alto_p+y, igual que en la
+    versión en Python, y la llave del heap empaca (f, g, nodo). g y parent viven
+    en la fila 0 de espacio; la dirección de llegada a un punto de salto es la
+    que va de su padre a él.
+
+    Regresa un arreglo int32 con los índices planos y*ancho+x (sin borde) de la
+    ruta completa, tramos rectos incluidos (vacío si no hay ruta).
+    """
+    alto_p, ancho_p = P.shape
+    ancho = ancho_p - 2
+    n = alto_p * ancho_p
+
+    bits = 1
+    while (1 << bits) <= n:
+        bits += 1
+    mascara = (1 << bits) - 1
+
+    g_todo, parent_todo, sello_todo, generacion = espacio
+    gen = _nueva_generacion(sello_todo, generacion, 0)
+    g = g_todo[0]
+    parent = parent_todo[0]
+    sello = sello_todo[0]
+
+    heap = _heap_inicial(ancho_p, alto_p)
+
+    px, py = mx + 1, my + 1
+    inicio_id = (ix + 1) * alto_p + (iy + 1)
+    meta_id = px * alto_p + py
+    g[inicio_id] = 0
+    parent[inicio_id] = -1
+    sello[inicio_id] = gen
+
+    heap[0] = (np.int64(abs(ix - mx) + abs(iy - my)) << (2 * bits)) | np.int64(inicio_id)
+    tam = 1
+
+    # Saltos de la expansión actual: (x, y) de cada punto encontrado
+    sx_pts = np.empty(4, np.int64)
+    sy_pts = np.empty(4, np.int64)
+
+    while tam > 0:
+        llave, tam = _heap_pop(heap, tam)
+        actual = llave & mascara
+        g_actual = (llave >> bits) & mascara
+
+        # Entrada vieja (ver _a_estrella_kernel)
+        if g_actual > g[actual]:
+            continue
+
+        if actual == meta_id:
+            # Reconstrucción: unir puntos de salto con tramos rectos
+            largo = g_actual + 1
+            ruta = np.empty(largo, np.int32)
+            k = largo - 1
+            c = actual
+            while parent[c] != -1:
+                p = parent[c]
+                x0, y0 = p // alto_p, p % alto_p
+                x1, y1 = c // alto_p, c % alto_p
+                sx = (x1 > x0) - (x1 < x0)
+                sy = (y1 > y0) - (y1 < y0)
+                for j in range(abs(x1 - x0) + abs(y1 - y0), 0, -1):
+                    ruta[k] = (y0 + sy * j - 1) * ancho + (x0 + sx * j - 1)
+                    k -= 1
+                c = p
+            ruta[0] = (c % alto_p - 1) * ancho + (c // alto_p - 1)
+            return ruta
+
+        x, y = actual // alto_p, actual % alto_p
+        dx, dy = 0, 0
+        if parent[actual] != -1:
+            x0, y0 = parent[actual] // alto_p, parent[actual] % alto_p
+            dx = (x > x0) - (x < x0)
+            dy = (y > y0) - (y < y0)
+
+        m = 0
+        if dy == 0:
+            # Inicio o llegada horizontal: seguir de frente y abrir ambos sentidos verticales
+            for s in (1, -1):
+                if dx != 0 and s != dx:
+                    continue
+                ok, e = _saltar_horizontal_jps(P, sv_abajo, sv_arriba, sh_der if s > 0 else sh_izq, x, y, s, px, py)
+                if ok:
+                    sx_pts[m], sy_pts[m] = e, y
+                    m += 1
+            for s in (1, -1):
+                ok, e = _saltar_vertical_jps(P, sv_abajo if s > 0 else sv_arriba, x, y, s, px, py)
+                if ok:
+                    sx_pts[m], sy_pts[m] = x, e
+                    m += 1
+        else:
+            # Llegada vertical: seguir de frente y solo los laterales forzados
+            ok, e = _saltar_vertical_jps(P, sv_abajo if dy > 0 else sv_arriba, x, y, dy, px, py)
+            if ok:
+                sx_pts[m], sy_pts[m] = x, e
+                m += 1
+            for s in (1, -1):
+                if P[y, x + s] and not P[y - dy, x + s]:
+                    ok, e = _saltar_horizontal_jps(P, sv_abajo, sv_arriba, sh_der if s > 0 else sh_izq, x, y, s, px, py)
+                    if ok:
+                        sx_pts[m], sy_pts[m] = e, y
+                        m += 1
+
+        for k in range(m):
+            nx, ny = sx_pts[k], sy_pts[k]
+            vecino = nx * alto_p + ny
+            nuevo_g = g_actual + abs(nx - x) + abs(ny - y)
+            if sello[vecino] != gen or nuevo_g < g[vecino]:
+                g[vecino] = nuevo_g
+                parent[vecino] = actual
+                sello[vecino] = gen
+                f = nuevo_g + abs(nx - px) + abs(ny - py)
+                heap, tam = _heap_push(heap, tam, (np.int64(f) << (2 * bits)) | (np.int64(nuevo_g) << bits) | np.int64(vecino))
+
+    return np.empty(0, np.int32)
+
+def a_estrella_jps_nb(
+    passable: np.ndarray,
+    inicio: Celda,
+    meta: Celda,
+    tablas=None,
+    espacio=None,
+) -> Optional[List[Celda]]:
+    """
+    Versión compilada de a_estrella_jps (misma firma, misma ruta resultante).
+
+    tablas es la salida de tablas_jps y espacio la de espacio_busqueda con el
+    tamaño de esas tablas; conviene pasarlos cuando se planean muchas rutas sobre
+    el mismo grid. Si Numba no está instalado se usa la implementación en Python puro.
+    """
+    if not NUMBA_DISPONIBLE:
+        return a_estrella_jps(passable, inicio, meta, tablas)
+
+    alto, ancho = passable.shape
+    ix, iy = inicio
+    mx, my = meta
+
+    # Validación rápida
+    if not (0 <= ix < ancho and 0 <= iy < alto and 0 <= mx < ancho and 0 <= my < alto):
+        return None
+    if passable[iy, ix] == 0 or passable[my, mx] == 0:
+        return None
+
+    P, sig_v, sig_h = tablas if tablas is not None else tablas_jps(passable)
+    if espacio is None:
+        espacio = espacio_busqueda(P.shape[0], P.shape[1], 1)
+    indices = _a_estrella_jps_kernel(
+        P, sig_v[1], sig_v[-1], sig_h[1], sig_h[-1], int(ix), int(iy), int(mx), int(my), espacio
+    )
+    if indices.size == 0:
+        return None
+    return [(i % ancho, i // ancho) for i in indices.tolist()]
+
+# Búsqueda multi-fuente: distancia de cada celda a la fuente más barata
+
+@compilar
+def _bfs_multi_fuente_kernel(passable_bits, ancho, alto, fuentes, costo, ids, objetivos):
+    """
+    BFS por niveles (costo 1 por paso) desde todas las fuentes a la vez. Las
+    fuentes llegan ordenadas por costo inicial: la fuente k entra a la frontera
+    cuando el nivel alcanza costo[k], así que cada celda se encola una sola vez.
+
+    origen guarda el id de la fuente de menor id entre las que empatan en
+    distancia. Si hay objetivos, la búsqueda se detiene en el nivel en que se
+    alcanza el último.
+    """
+    n = alto * ancho
+    n_fuentes = fuentes.shape[0]
+
+    dist = np.full(n, _INF, np.int32)
+    origen = np.full(n, -1, np.int32)
+    actual = np.empty(n, np.int32)
+    siguiente = np.empty(n, np.int32)
+    n_actual = 0
+
+    es_objetivo = np.zeros(n, np.bool_)
+    faltan = 0
+    for k in range(objetivos.shape[0]):
+        c = objetivos[k, 1] * ancho + objetivos[k, 0]
+        if not es_objetivo[c]:
+            es_objetivo[c] = True
+            faltan += 1
+
+    si = 0
+    d = costo[0] if n_fuentes > 0 else 0
+    nivel_final = _INF
+    while True:
+        # Fuentes cuyo costo inicial es el nivel actual
+        while si < n_fuentes and costo[si] == d:
+            c = fuentes[si, 1] * ancho + fuentes[si, 0]
+            if d < dist[c]:
+                dist[c] = d
+                origen[c] = ids[si]
+                actual[n_actual] = c
+                n_actual += 1
+            elif d == dist[c] and ids[si] < origen[c]:
+                origen[c] = ids[si]
+            si += 1
+
+        if n_actual == 0:
+            if si >= n_fuentes:
+                break
+            d = costo[si]
+            continue
+
+        # Las celdas del nivel d ya son definitivas (distancia y origen)
+        for t in range(n_actual):
+            if es_objetivo[actual[t]]:
+                faltan -= 1
+        if objetivos.shape[0] > 0 and faltan == 0:
+            nivel_final = d
+            break
+
+        n_siguiente = 0
+        for t in range(n_actual):
+            c = actual[t]
+            x = c % ancho
+            y = c // ancho
+            for k in range(4):
+                if k == 0:
+                    nx, ny = x + 1, y
+                elif k == 1:
+                    nx, ny = x - 1, y
+                elif k == 2:
+                    nx, ny = x, y + 1
+                else:
+                    nx, ny = x, y - 1
+
+                if nx < 0 or nx >= ancho or ny < 0 or ny >= alto:
+                    continue
+                if _transitable(passable_bits, nx, ny) == 0:
+                    continue
+
+                vecino = ny * ancho + nx
+                if d + 1 < dist[vecino]:
+                    dist[vecino] = d + 1
+                    origen[vecino] = origen[c]
+                    siguiente[n_siguiente] = vecino
+                    n_siguiente += 1
+                elif d + 1 == dist[vecino] and origen[c] < origen[vecino]:
+                    origen[vecino] = origen[c]
+
+        actual, siguiente = siguiente, actual
+        n_actual = n_siguiente
+        d += 1
+
+    # Sin alcanzar (o provisionales si se cortó la búsqueda): -1
+    for c in range(n):
+        if dist[c] > nivel_final or dist[c] == _INF:
+            dist[c] = -1
+            origen[c] = -1
+    return dist, origen
+
+def bfs_multi_fuente(
+    passable: np.ndarray,
+    fuentes: Sequence[Celda],
+    costo_inicial: Optional[Sequence[int]] = None,
+    objetivos: Optional[Sequence[Celda]] = None,
+    passable_bits: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Distancia en pasos desde la fuente más cercana a cada celda, en una sola pasada
+    O(V) en lugar de una búsqueda por par.
+
+    costo_inicial (opcional) suma un costo fijo por fuente: dist[y, x] es entonces
+    min_k(costo_inicial[k] + pasos(fuentes[k] -> (x, y))). Si se dan objetivos, solo
+    se garantiza el valor en esas celdas (la búsqueda se corta al cerrarlas todas).
+
+    Regresa (dist, origen), ambos int32 de la forma del grid: dist es -1 en celdas
+    bloqueadas o no alcanzadas, y origen es el índice en fuentes de la fuente que
+    logra el mínimo (la de menor índice si empatan). Sin Numba el mismo núcleo
+    corre en Python puro (correcto, pero lento en grids grandes).
+    """
+    alto, ancho = passable.shape
+    fuentes_a = np.asarray(fuentes, dtype=np.int64).reshape(-1, 2)
+    if costo_inicial is None:
+        costo_a = np.zeros(len(fuentes_a), dtype=np.int64)
+    else:
+        costo_a = np.asarray(costo_inicial, dtype=np.int64)
+    objetivos_a = np.asarray(objetivos if objetivos is not None else [], dtype=np.int64).reshape(-1, 2)
+
+    # Fuentes fuera del grid o sobre obstáculos no propagan
+    validas = (
+        (fuentes_a[:, 0] >= 0) & (fuentes_a[:, 0] < ancho)
+        & (fuentes_a[:, 1] >= 0) & (fuentes_a[:, 1] < alto)
+    )
+    validas[validas] = passable[fuentes_a[validas, 1], fuentes_a[validas, 0]] != 0
+    # Orden por costo inicial (estable: a igual costo, por índice)
+    ids = np.flatnonzero(validas)
+    ids = ids[np.argsort(costo_a[ids], kind="stable")]
+
+    if passable_bits is None:
+        passable_bits = empacar_transitable(passable)
+    dist, origen = _bfs_multi_fuente_kernel(
+        passable_bits, ancho, alto, fuentes_a[ids], costo_a[ids], ids.astype(np.int32), objetivos_a
+    )
+    return dist.reshape(alto, ancho), origen.reshape(alto, ancho)
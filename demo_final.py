@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
 import argparse
-import json
 import os
 from typing import List
+from json_io import escribir_json, leer_json
 from out_paths import asegurar_dirs_de_salidas
-from sim_core import Pedido, SimAlmacen, cargar_layout
+from sim_core import ASIGNACIONES, Pedido, SimAlmacen, cargar_layout, pedidos_desde_tabla, tabla_pedidos
 from scenario_config import agregar_argumento_config, aplicar_defaults_desde_config
 
 def _ruta_por_escenario(escenario: str, nombre_archivo: str) -> str:
@@ -21,21 +21,8 @@ def cargar_pedidos(ruta: str) -> List[Pedido]:
       ]
     }
     """
-    with open(ruta, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    pedidos: List[Pedido] = []
-    for p in data.get("pedidos", []):
-        pedidos.append(
-            Pedido(
-                pedido_id=int(p["pedido_id"]),
-                anaquel_id=int(p["anaquel_id"]),
-                estacion_id=int(p["estacion_id"]),
-                tick_creacion=int(p.get("tick_creacion", 0)),
-            )
-        )
-
-    return pedidos
+    data = leer_json(ruta)
+    return pedidos_desde_tabla(tabla_pedidos(data.get("pedidos", [])))
 
 def main():
     parser = argparse.ArgumentParser()
@@ -44,6 +31,22 @@ def main():
     parser.add_argument("--seed", type=int, default=None)
     parser.add_argument("--robots", type=int, default=None)
     parser.add_argument("--ticks", type=int, default=None)
+    parser.add_argument(
+        "--jps",
+        action="store_true",
+        default=None,
+        help="Si se activa, planea las rutas con Jump Point Search en lugar de A*.",
+    )
+    parser.add_argument(
+        "--asignacion",
+        type=str,
+        choices=ASIGNACIONES,
+        default=None,
+        help=(
+            "Asignación de pedidos: greedy con costo Manhattan, greedy con distancia real "
+            "(BFS multi-fuente) o asignación óptima con el algoritmo húngaro (requiere scipy)."
+        ),
+    )
 
     # Nuevo estándar
     parser.add_argument(
@@ -55,9 +58,9 @@ def main():
 
     # Overrides de entradas (modo avanzado / compatibilidad)
     parser.add_argument("--layout", type=str, default=None, help="(Opcional) Ruta explícita a layout.npy")
-    parser.add_argument("--estaciones", type=str, default=None, help="(Opcional) Ruta explícita a estaciones.json")
-    parser.add_argument("--anaqueles", type=str, default=None, help="(Opcional) Ruta explícita a anaqueles.json")
-    parser.add_argument("--spawn", type=str, default=None, help="(Opcional) Ruta explícita a spawn.json")
+    parser.add_argument("--estaciones", type=str, default=None, help="(Opcional) Ruta explícita a estaciones.npy")
+    parser.add_argument("--anaqueles", type=str, default=None, help="(Opcional) Ruta explícita a anaqueles.npy")
+    parser.add_argument("--spawn", type=str, default=None, help="(Opcional) Ruta explícita a spawn.npy")
     parser.add_argument("--pedidos", type=str, default=None, help="(Opcional) Ruta explícita a pedidos.json")
 
     # Salida
@@ -68,9 +71,9 @@ def main():
 
     # Resolver rutas por escenario si no se dieron explícitamente
     ruta_layout = args.layout or _ruta_por_escenario(args.escenario, "layout.npy")
-    ruta_estaciones = args.estaciones or _ruta_por_escenario(args.escenario, "estaciones.json")
-    ruta_anaqueles = args.anaqueles or _ruta_por_escenario(args.escenario, "anaqueles.json")
-    ruta_spawn = args.spawn or _ruta_por_escenario(args.escenario, "spawn.json")
+    ruta_estaciones = args.estaciones or _ruta_por_escenario(args.escenario, "estaciones.npy")
+    ruta_anaqueles = args.anaqueles or _ruta_por_escenario(args.escenario, "anaqueles.npy")
+    ruta_spawn = args.spawn or _ruta_por_escenario(args.escenario, "spawn.npy")
     ruta_pedidos = args.pedidos or _ruta_por_escenario(args.escenario, "pedidos.json")
 
     ruta_metricas = args.salida_metricas or _ruta_por_escenario(args.escenario, "metricas.json")
@@ -90,13 +93,14 @@ def main():
         puntos_spawn=spawns,
         pedidos=pedidos,
         seed=args.seed,
+        usar_jps=bool(args.jps),
+        asignacion=args.asignacion,
     )
 
     sim.run(args.ticks)
     m = sim.metricas()
 
-    with open(ruta_metricas, "w", encoding="utf-8") as f:
-        json.dump(m, f, indent=2, ensure_ascii=False)
+    escribir_json(m, ruta_metricas)
 
     print(f"[OK] Escenario: {args.escenario}")
     print(f"[OK] Métricas : {ruta_metricas}")
@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
 import argparse
-import json
 import os
 from dataclasses import dataclass
 from typing import Dict, List, Tuple
 import numpy as np
+from scipy.ndimage import label
+from a_estrella import mascara_transitable
+from a_estrella_nb import NUMBA_DISPONIBLE, compilar
 from out_paths import asegurar_dirs_de_salidas
 from scenario_config import agregar_argumento_config, aplicar_defaults_desde_config
 
@@ -15,6 +17,9 @@ BLOQUEADO = 3
 
 Celda = Tuple[int, int]
 
+# Vecindad 4-conectada (arriba/abajo/izquierda/derecha), igual que A*
+_CONECTIVIDAD_4 = np.array([[0, 1, 0], [1, 1, 1], [0, 1, 0]])
+
 @dataclass(frozen=True)
 class Estacion:
     estacion_id: int
@@ -36,31 +41,110 @@ def _en_rango(grid: np.ndarray, x: int, y: int) -> bool:
     alto_grid, ancho_grid = grid.shape
     return 0 <= x < ancho_grid and 0 <= y < alto_grid
 
+@compilar
+def _pintar_bloques_nb(grid, x_left, y_top, cols, filas, ancho_bloque, alto_bloque,
+                       ancho_pasillo, alto_pasillo):
+    """
+    Rellena los macro-bloques con el patrón de anaqueles (en sitio sobre grid).
+
+    Dentro de cada bloque (con margen interno de 1 celda): 2 columnas de anaquel,
+    1 columna libre (pasillo interno), y huecos raros de mantenimiento cada 17
+    filas / 11 columnas. Los IDs se asignan por bloque, luego por columna (x) y
+    luego por fila (y).
+
+    Regresa un arreglo int32 (N, 3) con filas (anaquel_id, x, y).
+    """
+    iw = max(0, ancho_bloque - 2)
+    ih = max(0, alto_bloque - 2)
+    salida = np.empty((filas * cols * iw * ih, 3), np.int32)
+    n = 0
+
+    y0 = y_top + alto_pasillo
+    for _ in range(filas):
+        x0 = x_left + ancho_pasillo
+        for _ in range(cols):
+            ix0 = x0 + 1
+            iy0 = y0 + 1
+            for xr in range(iw):
+                xx = ix0 + xr
+                if xr % 3 != 2:
+                    for yr in range(ih):
+                        yy = iy0 + yr
+                        if yr % 17 == 0 and xr % 11 == 0:
+                            continue
+                        if grid[yy, xx] == LIBRE:
+                            grid[yy, xx] = ANAQUEL
+                            salida[n, 0] = n
+                            salida[n, 1] = xx
+                            salida[n, 2] = yy
+                            n += 1
+                else:
+                    for yr in range(ih):
+                        yy = iy0 + yr
+                        if grid[yy, xx] != BLOQUEADO:
+                            grid[yy, xx] = LIBRE
+            x0 += ancho_bloque + ancho_pasillo
+        y0 += alto_bloque + alto_pasillo
+
+    return salida[:n]
+
+def _pintar_bloques_np(grid, x_left, y_top, cols, filas, ancho_bloque, alto_bloque,
+                       ancho_pasillo, alto_pasillo):
+    """
+    Mismo resultado que _pintar_bloques_nb, con máscaras de NumPy por bloque;
+    es la ruta sin Numba (el núcleo en Python puro recorrería celda por celda).
+    """
+    iw = max(0, ancho_bloque - 2)
+    ih = max(0, alto_bloque - 2)
+    yy_rel = np.arange(ih)[:, None]
+    xx_rel = np.arange(iw)[None, :]
+
+    # patrón: 2 columnas de anaquel, 1 columna libre (pasillo interno)
+    columnas_anaquel = (xx_rel % 3) != 2
+    # huecos raros (mantenimiento)
+    huecos = (yy_rel % 17 == 0) & (xx_rel % 11 == 0)
+
+    bloques = []
+    y0 = y_top + alto_pasillo
+    for _ in range(filas):
+        x0 = x_left + ancho_pasillo
+        for _ in range(cols):
+            ix0, iy0 = x0 + 1, y0 + 1
+            sub = grid[iy0:iy0 + ih, ix0:ix0 + iw]
+
+            pintar = columnas_anaquel & ~huecos & (sub == LIBRE)
+            sub[~columnas_anaquel & (sub != BLOQUEADO)] = LIBRE
+            sub[pintar] = ANAQUEL
+
+            # IDs por columna (x) y luego por fila (y)
+            xs_rel, ys_rel = np.nonzero(pintar.T)
+            bloques.append(np.stack([xs_rel + ix0, ys_rel + iy0], axis=1))
+            x0 += ancho_bloque + ancho_pasillo
+        y0 += alto_bloque + alto_pasillo
+
+    xy = np.concatenate(bloques) if bloques else np.empty((0, 2), dtype=np.int64)
+    salida = np.empty((len(xy), 3), dtype=np.int32)
+    salida[:, 0] = np.arange(len(xy))
+    salida[:, 1:] = xy
+    return salida
+
 def _bfs_alcanzable(grid: np.ndarray, celdas_inicio: List[Celda]) -> np.ndarray:
     """
     Regresa matriz booleana de alcanzabilidad para celdas LIBRE/ESTACION.
     ANAQUEL/BLOQUEADO se tratan como muros.
+
+    Equivale a un BFS 4-conectado desde celdas_inicio: se etiquetan las componentes
+    conexas de la máscara transitable y se conservan las que tocan alguna semilla.
     """
-    alto_grid, ancho_grid = grid.shape
-    transitable = (grid == LIBRE) | (grid == ESTACION)
-    visto = np.zeros((alto_grid, ancho_grid), dtype=bool)
-
-    cola: List[Celda] = []
-    for (x, y) in celdas_inicio:
-        if _en_rango(grid, x, y) and transitable[y, x]:
-            visto[y, x] = True
-            cola.append((x, y))
-
-    indice = 0
-    while indice < len(cola):
-        x, y = cola[indice]
-        indice += 1
-        for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
-            nx, ny = x + dx, y + dy
-            if _en_rango(grid, nx, ny) and (not visto[ny, nx]) and transitable[ny, nx]:
-                visto[ny, nx] = True
-                cola.append((nx, ny))
-    return visto
+    transitable = mascara_transitable(grid)
+    etiquetas, _ = label(transitable, structure=_CONECTIVIDAD_4)
+
+    semillas = {
+        int(etiquetas[y, x])
+        for (x, y) in celdas_inicio
+        if _en_rango(grid, x, y) and etiquetas[y, x]
+    }
+    return np.isin(etiquetas, list(semillas))
 
 def generar_layout(seed: int, ancho: int, alto: int, estaciones: int) -> Dict:
     """
@@ -146,46 +230,11 @@ def generar_layout(seed: int, ancho: int, alto: int, estaciones: int) -> Dict:
         y += alto_pasillo_horizontal + alto_bloque
 
     # Rellenar bloques con patrón de anaqueles
-    anaqueles: Dict[int, Celda] = {}
-    anaquel_id = 0
-
-    def _llenar_bloque_con_anaqueles(x0: int, y0: int, w: int, h: int) -> None:
-        nonlocal anaquel_id
-
-        # margen interno
-        ix0, iy0 = x0 + 1, y0 + 1
-        iw, ih = max(0, w - 2), max(0, h - 2)
-        if iw <= 0 or ih <= 0:
-            return
-
-        col = 0
-        xx = ix0
-        while xx < ix0 + iw:
-            # patrón: 2 columnas de anaquel, 1 columna libre (pasillo interno)
-            if col % 3 in (0, 1):
-                for yy in range(iy0, iy0 + ih):
-                    # huecos raros (mantenimiento)
-                    if (yy - iy0) % 17 == 0 and (xx - ix0) % 11 == 0:
-                        continue
-                    if grid[yy, xx] == LIBRE:
-                        grid[yy, xx] = ANAQUEL
-                        anaqueles[anaquel_id] = (xx, yy)
-                        anaquel_id += 1
-            else:
-                for yy in range(iy0, iy0 + ih):
-                    if grid[yy, xx] != BLOQUEADO:
-                        grid[yy, xx] = LIBRE
-            col += 1
-            xx += 1
-
-    # Iterar posiciones de bloques
-    y = y_top + alto_pasillo_horizontal
-    for _ in range(filas):
-        x = x_left + ancho_pasillo_principal
-        for _ in range(cols):
-            _llenar_bloque_con_anaqueles(x, y, ancho_bloque, alto_bloque)
-            x += ancho_bloque + ancho_pasillo_principal
-        y += alto_bloque + alto_pasillo_horizontal
+    pintar_bloques = _pintar_bloques_nb if NUMBA_DISPONIBLE else _pintar_bloques_np
+    anaqueles = pintar_bloques(
+        grid, x_left, y_top, cols, filas, ancho_bloque, alto_bloque,
+        ancho_pasillo_principal, alto_pasillo_horizontal,
+    )
 
     # Cross-aisles cada 10 filas (corredor de 2 filas)
     cada = 10
@@ -197,18 +246,18 @@ def generar_layout(seed: int, ancho: int, alto: int, estaciones: int) -> Dict:
     _recortar_rectangulo(grid, x_corredor, y_parking0 - 15, 2, (alto - 2) - (y_parking0 - 15), LIBRE)
 
     # puntos de spawn dentro del parking
-    spawn_points: List[Celda] = []
-    for yy in range(y_parking0, y_parking0 + alto_parking):
-        for xx in range(x_parking0, x_parking0 + ancho_parking):
-            if grid[yy, xx] == LIBRE:
-                spawn_points.append((xx, yy))
+    # (mismo orden fila por fila que el recorrido y->x, así el shuffle da la misma permutación)
+    sub = grid[y_parking0:y_parking0 + alto_parking, x_parking0:x_parking0 + ancho_parking]
+    ys, xs = np.nonzero(sub == LIBRE)
+    spawn_points = np.column_stack([xs + x_parking0, ys + y_parking0]).astype(np.int32)
     rng.shuffle(spawn_points)
     spawn_points = spawn_points[:800]
 
     # Validar alcanzabilidad: desde el primer spawn, docks alcanzables
-    if not spawn_points:
+    if len(spawn_points) == 0:
         raise RuntimeError("No se generaron spawn points.")
-    alcanzable = _bfs_alcanzable(grid, [spawn_points[0]])
+    inicio_spawn = spawn_points[:1].tolist()
+    alcanzable = _bfs_alcanzable(grid, inicio_spawn)
 
     for est in lista_estaciones:
         dx, dy = est.dock
@@ -216,16 +265,19 @@ def generar_layout(seed: int, ancho: int, alto: int, estaciones: int) -> Dict:
             _recortar_rectangulo(grid, dx, dy - 5, 2, 6, LIBRE)
 
     # Ensayar de nuevo alcanzabilidad
-    _ = _bfs_alcanzable(grid, [spawn_points[0]])
+    _ = _bfs_alcanzable(grid, inicio_spawn)
 
     layout = {
         "seed": seed,
         "width": ancho,
         "height": alto,
         "grid": grid,
-        # JSONs
-        "estaciones": [{"estacion_id": e.estacion_id, "dock": e.dock, "cell": e.cell} for e in lista_estaciones],
-        "anaqueles": [{"anaquel_id": aid, "home": home} for aid, home in anaqueles.items()],
+        # Arreglos binarios (.npy): filas (estacion_id, dock_x, dock_y, cell_x, cell_y),
+        # (anaquel_id, x, y) y (x, y)
+        "estaciones": np.array(
+            [(e.estacion_id, *e.dock, *e.cell) for e in lista_estaciones], dtype=np.int32
+        ).reshape(-1, 5),
+        "anaqueles": anaqueles,
         "spawn_points": spawn_points,
         "constants": {"LIBRE": LIBRE, "ANAQUEL": ANAQUEL, "ESTACION": ESTACION, "BLOQUEADO": BLOQUEADO},
     }
@@ -249,11 +301,11 @@ def main():
     parser.add_argument("--salida_layout", type=str, default=None,
                         help="(Opcional) Ruta explícita para layout.npy")
     parser.add_argument("--salida_estaciones", type=str, default=None,
-                        help="(Opcional) Ruta explícita para estaciones.json")
+                        help="(Opcional) Ruta explícita para estaciones.npy")
     parser.add_argument("--salida_anaqueles", type=str, default=None,
-                        help="(Opcional) Ruta explícita para anaqueles.json")
+                        help="(Opcional) Ruta explícita para anaqueles.npy")
     parser.add_argument("--salida_spawn", type=str, default=None,
-                        help="(Opcional) Ruta explícita para spawn.json")
+                        help="(Opcional) Ruta explícita para spawn.npy")
 
     # parámetro viejo, sin uso oficial
     parser.add_argument(
@@ -273,9 +325,9 @@ def main():
 
     # Resolver rutas estándar
     ruta_layout = args.salida_layout or _ruta_por_escenario(args.escenario, "layout.npy")
-    ruta_estaciones = args.salida_estaciones or _ruta_por_escenario(args.escenario, "estaciones.json")
-    ruta_anaqueles = args.salida_anaqueles or _ruta_por_escenario(args.escenario, "anaqueles.json")
-    ruta_spawn = args.salida_spawn or _ruta_por_escenario(args.escenario, "spawn.json")
+    ruta_estaciones = args.salida_estaciones or _ruta_por_escenario(args.escenario, "estaciones.npy")
+    ruta_anaqueles = args.salida_anaqueles or _ruta_por_escenario(args.escenario, "anaqueles.npy")
+    ruta_spawn = args.salida_spawn or _ruta_por_escenario(args.escenario, "spawn.npy")
 
     asegurar_dirs_de_salidas([ruta_layout, ruta_estaciones, ruta_anaqueles, ruta_spawn])
 
@@ -285,21 +337,17 @@ def main():
     # Guardar grid
     np.save(ruta_layout, grid)
 
-    # Guardar JSONs
-    with open(ruta_estaciones, "w", encoding="utf-8") as f:
-        json.dump(layout["estaciones"], f, indent=2, ensure_ascii=False)
-
-    with open(ruta_anaqueles, "w", encoding="utf-8") as f:
-        json.dump(layout["anaqueles"], f, indent=2, ensure_ascii=False)
-
-    with open(ruta_spawn, "w", encoding="utf-8") as f:
-        json.dump(layout["spawn_points"], f, indent=2, ensure_ascii=False)
+    # Guardar arreglos binarios
+    np.save(ruta_estaciones, layout["estaciones"])
+    np.save(ruta_anaqueles, layout["anaqueles"])
+    np.save(ruta_spawn, layout["spawn_points"])
 
     # Resumen
-    libres = int(np.sum(grid == LIBRE))
-    anaquel_celdas = int(np.sum(grid == ANAQUEL))
-    estacion_celdas = int(np.sum(grid == ESTACION))
-    bloqueadas = int(np.sum(grid == BLOQUEADO))
+    conteos = np.bincount(grid.ravel().astype(np.intp), minlength=4)
+    libres = int(conteos[LIBRE])
+    anaquel_celdas = int(conteos[ANAQUEL])
+    estacion_celdas = int(conteos[ESTACION])
+    bloqueadas = int(conteos[BLOQUEADO])
 
     print(f"[OK] Escenario: {args.escenario}")
     print(f"[OK] Layout     : {ruta_layout}")
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 # Genera pedidos discretos para el benchmark de robots de almacén
 import argparse
-import json
 import os
 import numpy as np
+from json_io import escribir_json
+from layout_io import cargar_anaqueles, cargar_estaciones, ruta_npy_o_json
 from out_paths import asegurar_dirs_de_salidas
 from scenario_config import agregar_argumento_config, aplicar_defaults_desde_config
 
@@ -45,13 +46,13 @@ def main():
         "--archivo_estaciones",
         type=str,
         default=None,
-        help="(Opcional) Ruta explícita a estaciones.json. Si se omite, se usa outputs/<escenario>/estaciones.json",
+        help="(Opcional) Ruta explícita a estaciones.npy. Si se omite, se usa outputs/<escenario>/estaciones.npy",
     )
     parser.add_argument(
         "--archivo_anaqueles",
         type=str,
         default=None,
-        help="(Opcional) Ruta explícita a anaqueles.json. Si se omite, se usa outputs/<escenario>/anaqueles.json",
+        help="(Opcional) Ruta explícita a anaqueles.npy. Si se omite, se usa outputs/<escenario>/anaqueles.npy",
     )
     parser.add_argument(
         "--salida",
@@ -64,58 +65,61 @@ def main():
     args = parser.parse_args()
 
     # Resolver rutas estándar
-    ruta_estaciones = args.archivo_estaciones or _ruta_por_escenario(args.escenario, "estaciones.json")
-    ruta_anaqueles = args.archivo_anaqueles or _ruta_por_escenario(args.escenario, "anaqueles.json")
+    ruta_estaciones = args.archivo_estaciones or _ruta_por_escenario(args.escenario, "estaciones.npy")
+    ruta_anaqueles = args.archivo_anaqueles or _ruta_por_escenario(args.escenario, "anaqueles.npy")
     ruta_salida = args.salida or _ruta_por_escenario(args.escenario, "pedidos.json")
 
+    # Se reporta la ruta que realmente se lee (el .json anterior si no hay .npy)
+    ruta_estaciones = ruta_npy_o_json(ruta_estaciones)
+    ruta_anaqueles = ruta_npy_o_json(ruta_anaqueles)
+
     # Asegurar carpeta de salida (y cualquier subcarpeta)
     asegurar_dirs_de_salidas([ruta_salida])
 
     rng = np.random.default_rng(args.seed)
 
     # Cargar estaciones y anaqueles
-    with open(ruta_estaciones, "r", encoding="utf-8") as f:
-        estaciones = json.load(f)
-
-    with open(ruta_anaqueles, "r", encoding="utf-8") as f:
-        anaqueles = json.load(f)
-
-    ids_estacion = [e["estacion_id"] for e in estaciones]
-    ids_anaquel = [a["anaquel_id"] for a in anaqueles]
-
-    pedidos = []
-
-    for i in range(args.pedidos):
-        estacion_id = int(rng.choice(ids_estacion))
-        anaquel_id = int(rng.choice(ids_anaquel))
-
-        if args.burst:
-            if rng.random() < 0.70:
-                tick_creacion = int(rng.integers(0, 2001))  # 0 a 2000 inclusive
-            else:
-                tick_creacion = int(rng.integers(0, 10001))
-        else:
-            tick_creacion = 0
-
-        pedidos.append(
-            {
-                "pedido_id": i,
-                "anaquel_id": anaquel_id,
-                "estacion_id": estacion_id,
-                "tick_creacion": tick_creacion,
-            }
-        )
+    estaciones = cargar_estaciones(ruta_estaciones)
+
+    anaqueles = cargar_anaqueles(ruta_anaqueles)
+
+    ids_estacion = estaciones[:, 0]
+    ids_anaquel = anaqueles[:, 0]
 
-    with open(ruta_salida, "w", encoding="utf-8") as f:
-        json.dump(
-            {
-                "seed": args.seed,
-                "pedidos": pedidos,
-            },
-            f,
-            indent=2,
-            ensure_ascii=False,
+    # Todos los sorteos en lote (una llamada a NumPy por atributo, no por pedido)
+    n = args.pedidos
+    estacion_ids = ids_estacion[rng.integers(0, len(ids_estacion), size=n)]
+    anaquel_ids = ids_anaquel[rng.integers(0, len(ids_anaquel), size=n)]
+
+    if args.burst:
+        temprano = rng.random(n) < 0.70
+        ticks_creacion = np.where(
+            temprano,
+            rng.integers(0, 2001, size=n),  # 0 a 2000 inclusive
+            rng.integers(0, 10001, size=n),
+        )
+    else:
+        ticks_creacion = np.zeros(n, dtype=np.int64)
+
+    pedidos = [
+        {
+            "pedido_id": i,
+            "anaquel_id": anaquel_id,
+            "estacion_id": estacion_id,
+            "tick_creacion": tick_creacion,
+        }
+        for i, (anaquel_id, estacion_id, tick_creacion) in enumerate(
+            zip(anaquel_ids.tolist(), estacion_ids.tolist(), ticks_creacion.tolist())
         )
+    ]
+
+    escribir_json(
+        {
+            "seed": args.seed,
+            "pedidos": pedidos,
+        },
+        ruta_salida,
+    )
 
     print(f"[OK] Escenario: {args.escenario}")
     print(f"[OK] Estaciones: {ruta_estaciones}")
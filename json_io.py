@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# Lectura/escritura de JSON: usa orjson si está instalado, si no el módulo json estándar
+
+from typing import Any
+
+try:
+    import orjson
+    ORJSON_DISPONIBLE = True
+except ImportError:
+    import json
+    ORJSON_DISPONIBLE = False
+
+def leer_json(ruta: str) -> Any:
+    """Carga un archivo JSON (UTF-8)."""
+    if ORJSON_DISPONIBLE:
+        with open(ruta, "rb") as f:
+            return orjson.loads(f.read())
+    with open(ruta, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def escribir_json(obj: Any, ruta: str) -> None:
+    """
+    Guarda obj como JSON con sangría de 2 espacios y UTF-8 sin escapar.
+    Con orjson también se aceptan escalares y arreglos de NumPy.
+    """
+    if ORJSON_DISPONIBLE:
+        with open(ruta, "wb") as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        return
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# Carga de los artefactos del layout que escribe generador_layout (estaciones,
+# anaqueles, spawn): arreglos .npy, o el .json de escenarios generados antes
+
+import os
+import numpy as np
+from json_io import leer_json
+
+def ruta_npy_o_json(ruta: str) -> str:
+    """
+    Ruta que realmente se lee. Compatibilidad con escenarios generados antes de
+    los .npy: si no existe <archivo>.npy pero sí <archivo>.json, se usa este último.
+    """
+    if ruta.endswith(".npy") and not os.path.exists(ruta):
+        alterna = ruta[:-len(".npy")] + ".json"
+        if os.path.exists(alterna):
+            return alterna
+    return ruta
+
+def cargar_estaciones(ruta: str) -> np.ndarray:
+    """
+    Carga estaciones como arreglo int32 de forma (N, 5):
+    (estacion_id, dock_x, dock_y, cell_x, cell_y).
+    Acepta estaciones.npy o el formato anterior estaciones.json.
+    """
+    ruta = ruta_npy_o_json(ruta)
+    if ruta.endswith(".json"):
+        estaciones = leer_json(ruta)
+        filas = [(e["estacion_id"], *e["dock"], *e["cell"]) for e in estaciones]
+        return np.array(filas, dtype=np.int32).reshape(-1, 5)
+    return np.load(ruta)
+
+def cargar_anaqueles(ruta: str) -> np.ndarray:
+    """
+    Carga anaqueles como arreglo int32 de forma (N, 3): (anaquel_id, x, y).
+    Acepta anaqueles.npy o el formato anterior anaqueles.json.
+    """
+    ruta = ruta_npy_o_json(ruta)
+    if ruta.endswith(".json"):
+        anaqueles = leer_json(ruta)
+        filas = [(a["anaquel_id"], a["home"][0], a["home"][1]) for a in anaqueles]
+        return np.array(filas, dtype=np.int32).reshape(-1, 3)
+    return np.load(ruta)
+
+def cargar_spawn(ruta: str) -> np.ndarray:
+    """
+    Carga puntos de spawn como arreglo int32 de forma (N, 2): (x, y).
+    Acepta spawn.npy o el formato anterior spawn.json.
+    """
+    ruta = ruta_npy_o_json(ruta)
+    if ruta.endswith(".json"):
+        spawns = leer_json(ruta)
+        return np.array(spawns, dtype=np.int32).reshape(-1, 2)
+    return np.load(ruta)
@@ -2,11 +2,11 @@
 from __future__ import annotations
 
 import argparse
-import json
-from copy import deepcopy
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+from json_io import leer_json
+
 # Nombre por defecto del archivo editable
 DEFAULT_CONFIG_PATH = "sim_config.json"
 
@@ -46,6 +46,8 @@ DEFAULTS_BASE: Dict[str, Dict[str, Any]] = {
         "seed": 67,
         "robots": 20,
         "ticks": 10000,
+        "jps": False,
+        "asignacion": "manhattan",
 
         # overrides de entradas
         "layout": None,
@@ -64,6 +66,8 @@ DEFAULTS_BASE: Dict[str, Dict[str, Any]] = {
         "ticks": 10000,
         "pasos_por_frame": 25,
         "fps": 20,
+        "jps": False,
+        "asignacion": "manhattan",
 
         
         "ffmpeg_path": None,
@@ -83,12 +87,15 @@ DEFAULTS_BASE: Dict[str, Dict[str, Any]] = {
 }
 
 
-def _deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
-
-    out = deepcopy(base)
+def _merge_dos_niveles(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Merge de {seccion: {clave: valor}}: el esquema solo tiene dos niveles y los
+    valores son escalares, así que basta con copiar cada sección (sin deepcopy).
+    """
+    out = {k: dict(v) if isinstance(v, dict) else v for k, v in base.items()}
     for k, v in override.items():
         if isinstance(v, dict) and isinstance(out.get(k), dict):
-            out[k] = _deep_merge(out[k], v)
+            out[k].update(v)
         else:
             out[k] = v
     return out
@@ -99,7 +106,7 @@ def cargar_config(path: Optional[str]) -> Dict[str, Any]:
     Carga config desde JSON y hace merge con DEFAULTS_BASE.
 
     """
-    cfg = deepcopy(DEFAULTS_BASE)
+    cfg = _merge_dos_niveles(DEFAULTS_BASE, {})
 
     if not path:
         return cfg
@@ -109,13 +116,12 @@ def cargar_config(path: Optional[str]) -> Dict[str, Any]:
         print(f"Advertencia: archivo de configuración no existe: {path}")
         return cfg
 
-    with p.open("r", encoding="utf-8") as f:
-        user_cfg = json.load(f)
+    user_cfg = leer_json(str(p))
 
     if not isinstance(user_cfg, dict):
         raise ValueError("El archivo de configuración debe contener un objeto JSON en el nivel raíz.")
 
-    cfg = _deep_merge(cfg, user_cfg)
+    cfg = _merge_dos_niveles(cfg, user_cfg)
     return cfg
 
 
@@ -1,16 +1,46 @@
 #!/usr/bin/env python3
-import json
 import os
-from dataclasses import dataclass, field
-from typing import Dict, List, NamedTuple, Optional, Tuple
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
 import numpy as np
-from a_estrella import a_estrella
+from a_estrella import mascara_transitable, tablas_jps
+from a_estrella_nb import (
+    NUMBA_DISPONIBLE,
+    a_estrella_jps_nb,
+    a_estrella_lote,
+    a_estrella_nb,
+    bfs_multi_fuente,
+    compilar,
+    empacar_transitable,
+    espacio_busqueda,
+)
+from layout_io import cargar_anaqueles, cargar_estaciones, cargar_spawn
 from tabla_reservas import TablaReservas
 
+try:
+    from scipy.optimize import linear_sum_assignment
+    SCIPY_DISPONIBLE = True
+except ImportError:
+    SCIPY_DISPONIBLE = False
+
 LIBRE = 0
 ESTACION = 2
 
 Celda = Tuple[int, int]
+Ruta = Tuple[Celda, ...]
+
+# Estados de robot: código int8 en SimAlmacen.estado_robots <-> nombre
+ESTADOS = ("INACTIVO", "A_RECOGER", "A_ESTACION", "RETORNO")
+INACTIVO, A_RECOGER, A_ESTACION, RETORNO = range(len(ESTADOS))
+_CODIGO_ESTADO = {nombre: i for i, nombre in enumerate(ESTADOS)}
+
+# Máximo de rutas (inicio, meta) memoizadas por simulación
+MAX_RUTAS_CACHE = 10_000
+
+# Criterio de _asignar_pedidos: greedy con costo Manhattan o con distancia real
+# (BFS multi-fuente), o asignación óptima robots x pedidos (húngaro)
+ASIGNACIONES = ("manhattan", "bfs", "hungaro")
 
 # Utilidades de rutas (estándar outputs/<escenario>/...)
 
@@ -29,16 +59,16 @@ def resolver_rutas_escenario(escenario: str) -> RutasEscenario:
     Convención estándar:
       outputs/<escenario>/
         layout.npy
-        estaciones.json
-        anaqueles.json
-        spawn.json
+        estaciones.npy
+        anaqueles.npy
+        spawn.npy
         pedidos.json
     """
     return RutasEscenario(
         layout=_ruta_por_escenario(escenario, "layout.npy"),
-        estaciones=_ruta_por_escenario(escenario, "estaciones.json"),
-        anaqueles=_ruta_por_escenario(escenario, "anaqueles.json"),
-        spawn=_ruta_por_escenario(escenario, "spawn.json"),
+        estaciones=_ruta_por_escenario(escenario, "estaciones.npy"),
+        anaqueles=_ruta_por_escenario(escenario, "anaqueles.npy"),
+        spawn=_ruta_por_escenario(escenario, "spawn.npy"),
         pedidos=_ruta_por_escenario(escenario, "pedidos.json"),
     )
 
@@ -53,50 +83,134 @@ class Pedido:
     tick_asignacion: Optional[int] = None
     tick_completado: Optional[int] = None
 
-@dataclass
 class Robot:
-    robot_id: int
-    pos: Celda
-    estado: str = "INACTIVO"  # INACTIVO, A_RECOGER, A_ESTACION, RETORNO
-    pedido_id: Optional[int] = None
-    anaquel_home: Optional[Celda] = None
-    estacion_dock: Optional[Celda] = None
-    ruta: List[Celda] = field(default_factory=list)
-    idx_ruta: int = 0
-    ticks_espera: int = 0
-    celdas_movidas: int = 0
-    ticks_ocupado: int = 0
+    """
+    Registro de un robot. La posición, el estado y los contadores viven en los
+    arreglos SoA de SimAlmacen (indexados por robot_id); las propiedades solo los
+    exponen. Aquí quedan el pedido en curso y la ruta.
+    """
+    __slots__ = ("_sim", "robot_id", "pedido_id", "anaquel_home", "pickup", "estacion_dock", "ruta", "idx_ruta")
+
+    def __init__(self, sim: "SimAlmacen", robot_id: int) -> None:
+        self._sim = sim
+        self.robot_id = robot_id
+        self.pedido_id: Optional[int] = None
+        self.anaquel_home: Optional[Celda] = None
+        self.pickup: Optional[Celda] = None
+        self.estacion_dock: Optional[Celda] = None
+        self.ruta: Sequence[Celda] = []
+        self.idx_ruta = 0
+
+    @property
+    def pos(self) -> Celda:
+        x, y = self._sim.pos_robots[self.robot_id].tolist()
+        return (x, y)
+
+    @pos.setter
+    def pos(self, celda: Celda) -> None:
+        self._sim.pos_robots[self.robot_id] = celda
+
+    @property
+    def estado(self) -> str:  # INACTIVO, A_RECOGER, A_ESTACION, RETORNO
+        return ESTADOS[self._sim.estado_robots[self.robot_id]]
+
+    @estado.setter
+    def estado(self, estado: str) -> None:
+        self._sim.estado_robots[self.robot_id] = _CODIGO_ESTADO[estado]
+
+    @property
+    def ticks_espera(self) -> int:
+        return int(self._sim.ticks_espera[self.robot_id])
+
+    @property
+    def celdas_movidas(self) -> int:
+        return int(self._sim.celdas_movidas[self.robot_id])
+
+    @property
+    def ticks_ocupado(self) -> int:
+        return int(self._sim.ticks_ocupado[self.robot_id])
+
+# Columnas de cada pedido de pedidos.json (mismo orden que los campos de Pedido)
+PEDIDO_DTYPE = np.dtype([
+    ("pedido_id", np.int64),
+    ("anaquel_id", np.int64),
+    ("estacion_id", np.int64),
+    ("tick_creacion", np.int64),
+])
+
+def tabla_pedidos(pedidos_json: List[dict]) -> np.ndarray:
+    """
+    Arreglo estructurado (N,) con PEDIDO_DTYPE a partir de la lista "pedidos" de
+    pedidos.json (tick_creacion es opcional, 0 por defecto). Una pasada por
+    columna con np.fromiter, sin int() por campo.
+    """
+    n = len(pedidos_json)
+    tabla = np.empty(n, dtype=PEDIDO_DTYPE)
+    for campo in ("pedido_id", "anaquel_id", "estacion_id"):
+        tabla[campo] = np.fromiter((p[campo] for p in pedidos_json), dtype=np.int64, count=n)
+    tabla["tick_creacion"] = np.fromiter(
+        (p.get("tick_creacion", 0) for p in pedidos_json), dtype=np.int64, count=n
+    )
+    return tabla
+
+def pedidos_desde_tabla(tabla: np.ndarray) -> List[Pedido]:
+    """Un Pedido por fila de un arreglo con PEDIDO_DTYPE."""
+    return list(map(Pedido, *(tabla[campo].tolist() for campo in PEDIDO_DTYPE.names)))
+
+
+def _tabla_por_id(ids: np.ndarray, xy: np.ndarray, nombre: str) -> np.ndarray:
+    """Arreglo int32 (max_id+1, 2) donde la fila i es la celda del id i (-1 si no existe)."""
+    # Un id negativo indexaría otra fila de la tabla
+    if ids.size and int(ids.min()) < 0:
+        raise ValueError(f"{nombre}: id negativo ({int(ids.min())}); los ids deben ser >= 0")
+    tabla = np.full((int(ids.max()) + 1 if ids.size else 0, 2), -1, dtype=np.int32)
+    tabla[ids] = xy
+    return tabla
+
+def _ids_sin_fila(tabla: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """True donde el id no tiene celda en la tabla de _tabla_por_id (negativo, fuera de rango o hueco)."""
+    dentro = (ids >= 0) & (ids < len(tabla))
+    sin_fila = ~dentro
+    sin_fila[dentro] = tabla[ids[dentro], 0] < 0
+    return sin_fila
+
+def _celda(tabla: np.ndarray, i: int) -> Celda:
+    x, y = tabla[i].tolist()
+    return (x, y)
 
 def cargar_layout(ruta_grid: str, ruta_estaciones: str, ruta_anaqueles: str, ruta_spawn: str):
     """
     Carga el layout del CEDIS y sus entidades desde archivos.
 
     Regresa:
-      - grid (np.ndarray)
-      - estacion_dock: Dict[estacion_id -> (x,y)]
-      - anaquel_home: Dict[anaquel_id -> (x,y)]
+      - grid (np.ndarray int8 C-contiguo; mapeado en memoria de solo lectura si
+        el archivo ya viene así, como lo escribe generador_layout)
+      - estacion_dock: np.ndarray int32 (E, 2), fila estacion_id -> (x,y)
+      - anaquel_home: np.ndarray int32 (A, 2), fila anaquel_id -> (x,y)
       - spawns: List[(x,y)]
     """
-    grid = np.load(ruta_grid)
+    # mmap: el SO comparte las páginas del archivo entre corridas; el grid no se modifica
+    grid = np.load(ruta_grid, mmap_mode="r")
+    # Layouts de otras fuentes (p. ej. int64): una sola conversión a int8 C-contiguo,
+    # 8 veces menos memoria y el tipo que esperan las búsquedas y los kernels
+    if grid.dtype != np.int8 or not grid.flags["C_CONTIGUOUS"]:
+        grid = np.ascontiguousarray(grid, dtype=np.int8)
 
-    with open(ruta_estaciones, "r", encoding="utf-8") as f:
-        estaciones = json.load(f)
-    with open(ruta_anaqueles, "r", encoding="utf-8") as f:
-        anaqueles = json.load(f)
-    with open(ruta_spawn, "r", encoding="utf-8") as f:
-        spawns = json.load(f)
+    estaciones = cargar_estaciones(ruta_estaciones)
+    anaqueles = cargar_anaqueles(ruta_anaqueles)
+    spawns = cargar_spawn(ruta_spawn)
 
-    estacion_dock = {int(e["estacion_id"]): tuple(e["dock"]) for e in estaciones}
-    anaquel_home = {int(a["anaquel_id"]): tuple(a["home"]) for a in anaqueles}
+    # Estructura de arreglos: coordenadas contiguas indexadas por id
+    estacion_dock = _tabla_por_id(estaciones[:, 0], estaciones[:, 1:3], "estaciones")
+    anaquel_home = _tabla_por_id(anaqueles[:, 0], anaqueles[:, 1:3], "anaqueles")
 
-    # Robustez: normalizar spawn a tuplas de int
-    spawns_norm = [(int(p[0]), int(p[1])) for p in spawns]
+    # tolist() ya entrega int de Python
+    spawns_norm = [(x, y) for x, y in spawns.tolist()]
 
     return grid, estacion_dock, anaquel_home, spawns_norm
 
-def celdas_adyacentes(celda: Celda) -> List[Celda]:
-    x, y = celda
-    return [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]
+# Desplazamientos a las 4 celdas adyacentes, en orden de preferencia para la recolección
+_ADYACENTES = ((1, 0), (-1, 0), (0, 1), (0, -1))
 
 def elegir_objetivo_adyacente(grid: np.ndarray, celda_anaquel: Celda) -> Optional[Celda]:
     """
@@ -104,42 +218,227 @@ def elegir_objetivo_adyacente(grid: np.ndarray, celda_anaquel: Celda) -> Optiona
     desde una celda adyacente transitable. Se elige la primera celda adyacente válida.
     """
     alto, ancho = grid.shape
+    cx, cy = int(celda_anaquel[0]), int(celda_anaquel[1])
+
+    for dx, dy in _ADYACENTES:
+        x, y = cx + dx, cy + dy
+        if 0 <= x < ancho and 0 <= y < alto:
+            g_val = grid[y, x]
+            if g_val == LIBRE or g_val == ESTACION:
+                return (x, y)
+    return None
+
+def _tabla_pickups(passable: np.ndarray, anaquel_home: np.ndarray) -> np.ndarray:
+    """
+    Versión vectorizada de elegir_objetivo_adyacente para todos los anaqueles:
+    arreglo int32 (A, 2) con la celda de recolección de cada anaquel_id (-1 si no hay).
+    """
+    alto, ancho = passable.shape
+    pickups = np.full_like(anaquel_home, -1)
+    pendiente = np.ones(len(anaquel_home), dtype=bool)
+    # Mismo orden de preferencia que elegir_objetivo_adyacente
+    for dx, dy in _ADYACENTES:
+        x = anaquel_home[:, 0] + dx
+        y = anaquel_home[:, 1] + dy
+        ok = pendiente & (x >= 0) & (x < ancho) & (y >= 0) & (y < alto)
+        ok[ok] = passable[y[ok], x[ok]] != 0
+        pickups[ok, 0] = x[ok]
+        pickups[ok, 1] = y[ok]
+        pendiente &= ~ok
+    return pickups
+
+def _zona_de(celda: Celda, rects: Sequence[Tuple[int, int, int, int]]) -> int:
+    """Índice de la primera zona (xmin, xmax, ymin, ymax) que contiene la celda, o -1."""
+    x, y = celda
+    for k, (xmin, xmax, ymin, ymax) in enumerate(rects):
+        if xmin <= x <= xmax and ymin <= y <= ymax:
+            return k
+    return -1
+
+def _conteo_por_zona(pos: np.ndarray, rects: Sequence[Tuple[int, int, int, int]]) -> List[int]:
+    """Robots por zona para todas las posiciones (R, 2) a la vez; equivale a _zona_de por robot."""
+    if not rects:
+        return []
+    r = np.array(rects, dtype=np.int64).reshape(-1, 4)
+    x = pos[:, :1]
+    y = pos[:, 1:]
+    dentro = (x >= r[:, 0]) & (x <= r[:, 1]) & (y >= r[:, 2]) & (y <= r[:, 3])
+    hay = dentro.any(axis=1)
+    return np.bincount(dentro.argmax(axis=1)[hay], minlength=len(rects)).tolist()
+
+@compilar
+def _zona_nb(x, y, rects):
+    for k in range(rects.shape[0]):
+        if rects[k, 0] <= x <= rects[k, 1] and rects[k, 2] <= y <= rects[k, 3]:
+            return k
+    return -1
+
+@compilar
+def _confirmar_movimientos_nb(pos, prop, rects, capacidades, sello_celda, sello_arista, origen_arista, t_sig):
+    """
+    Fase de confirmación de SimAlmacen.step compilada (mismo orden y mismas reglas).
 
-    def en_rango(x: int, y: int) -> bool:
-        return 0 <= x < ancho and 0 <= y < alto
+    Solo se reserva y consulta t_sig, así que la tabla de reservas se reemplaza por
+    sellos densos por celda: sello_celda[y, x] == t_sig si la celda está reservada, y
+    sello_arista/origen_arista guardan la arista de entrada (origen -> celda) en t_sig
+    (a lo más una por celda, porque la celda destino queda reservada).
+    capacidades[k] < 0 significa zona sin límite.
 
-    for c in celdas_adyacentes(celda_anaquel):
-        x, y = c
-        if en_rango(x, y) and grid[y, x] in (LIBRE, ESTACION):
-            return c
-    return None
+    Regresa (movido, bloqueado): máscaras por robot.
+    """
+    n = pos.shape[0]
+    ancho = sello_celda.shape[1]
+    movido = np.zeros(n, np.bool_)
+    bloqueado = np.zeros(n, np.bool_)
+
+    # Conteo actual de robots por zona
+    conteo = np.zeros(rects.shape[0], np.int64)
+    for i in range(n):
+        z = _zona_nb(pos[i, 0], pos[i, 1], rects)
+        if z >= 0:
+            conteo[z] += 1
+
+    for i in range(n):
+        ax = pos[i, 0]
+        ay = pos[i, 1]
+        sx = prop[i, 0]
+        sy = prop[i, 1]
+
+        if sx == ax and sy == ay:
+            sello_celda[ay, ax] = t_sig
+            continue
+
+        # Celda destino libre y sin la arista opuesta (siguiente -> actual) reservada
+        libre = sello_celda[sy, sx] != t_sig
+        if libre and sello_arista[ay, ax] == t_sig and origen_arista[ay, ax] == sy * ancho + sx:
+            libre = False
+
+        if not libre:
+            bloqueado[i] = True
+            sello_celda[ay, ax] = t_sig
+            continue
+
+        za = _zona_nb(ax, ay, rects)
+        zs = _zona_nb(sx, sy, rects)
+
+        # Control de capacidad de zona (solo entrada)
+        if zs >= 0 and za != zs and capacidades[zs] >= 0 and conteo[zs] >= capacidades[zs]:
+            bloqueado[i] = True
+            sello_celda[ay, ax] = t_sig
+            continue
+
+        sello_celda[sy, sx] = t_sig
+        sello_arista[sy, sx] = t_sig
+        origen_arista[sy, sx] = ay * ancho + ax
+
+        if za >= 0 and za != zs:
+            conteo[za] -= 1
+        if zs >= 0 and za != zs:
+            conteo[zs] += 1
+        movido[i] = True
+
+    return movido, bloqueado
 
 class SimAlmacen:
     def __init__(
         self,
         grid: np.ndarray,
-        estacion_dock: Dict[int, Celda],
-        anaquel_home: Dict[int, Celda],
+        estacion_dock: np.ndarray,
+        anaquel_home: np.ndarray,
         robots: int,
         puntos_spawn: List[Celda],
         pedidos: List[Pedido],
         seed: int,
+        usar_jps: bool = False,
+        asignacion: str = "manhattan",
     ):
         self.grid = grid
+        # Máscara transitable (LIBRE/ESTACION) que consume A*; el grid no cambia durante la simulación
+        self.passable = mascara_transitable(grid)
+        # La misma máscara a 1 bit por celda para el kernel compilado (cabe en L1)
+        self.passable_bits = empacar_transitable(self.passable)
+        # Búferes de búsqueda reutilizados por todas las rutas (una fila por hilo)
+        self._espacio = espacio_busqueda(*self.passable.shape)
+        # Con usar_jps toda la planeación pasa por Jump Point Search (rutas de igual
+        # longitud, pero el desempate entre rutas de igual costo difiere del de A*)
+        self.usar_jps = usar_jps
+        self.tablas_jps = tablas_jps(self.passable) if usar_jps else None
+        self._espacio_jps = espacio_busqueda(*self.tablas_jps[0].shape, 1) if usar_jps else None
+        # Rutas memoizadas por (inicio, meta) con desalojo LRU; válido porque el grid tampoco cambia
+        self._rutas: "OrderedDict[Tuple[Celda, Celda], Optional[Ruta]]" = OrderedDict()
         self.estacion_dock = estacion_dock
         self.anaquel_home = anaquel_home
+        # El grid y los anaqueles son estáticos: la celda de recolección depende solo del anaquel_id
+        self.pickup_por_anaquel = _tabla_pickups(self.passable, anaquel_home)
+        sin_pickup = int(np.sum((self.pickup_por_anaquel[:, 0] < 0) & (anaquel_home[:, 0] >= 0)))
+        if sin_pickup:
+            print(f"Advertencia: {sin_pickup} anaqueles sin celda de recolección transitable; sus pedidos se ignoran.")
         self.pedidos = pedidos
+        # pedido_id -> índice en self.pedidos (el primero, si hubiera ids repetidos)
+        self._idx_por_pedido_id: Dict[int, int] = {}
+        for i, p in enumerate(pedidos):
+            self._idx_por_pedido_id.setdefault(p.pedido_id, i)
+        # Por pedido (índice en self.pedidos): celda de recolección y tramo fijo anaquel -> estación
+        anaquel_ids = np.array([p.anaquel_id for p in pedidos], dtype=np.intp)
+        estacion_ids = np.array([p.estacion_id for p in pedidos], dtype=np.intp)
+        # Un id fuera de las tablas dejaría al robot sin destino: se rechaza de entrada
+        invalidos = _ids_sin_fila(anaquel_home, anaquel_ids) | _ids_sin_fila(estacion_dock, estacion_ids)
+        if invalidos.any():
+            p = pedidos[int(np.argmax(invalidos))]
+            raise ValueError(
+                f"{int(invalidos.sum())} pedidos con anaquel_id o estacion_id que no existe en el layout "
+                f"(p. ej. pedido {p.pedido_id}: anaquel_id={p.anaquel_id}, estacion_id={p.estacion_id})"
+            )
+        self._pickup_pedido = self.pickup_por_anaquel[anaquel_ids].astype(np.int64)
+        self._con_pickup = self._pickup_pedido[:, 0] >= 0
+        self._dist_rack_estacion = np.abs(self._pickup_pedido - estacion_dock[estacion_ids]).sum(axis=1)
         self.seed = seed
         self.tick = 0
 
+        # Criterio de asignación de pedidos (ver _asignar_pedidos)
+        if asignacion not in ASIGNACIONES:
+            raise ValueError(f"asignacion debe ser una de {ASIGNACIONES}, no {asignacion!r}")
+        if asignacion == "hungaro" and not SCIPY_DISPONIBLE:
+            print("Advertencia: scipy no está instalado; se usa la asignación greedy (manhattan).")
+            asignacion = "manhattan"
+        self.asignacion = asignacion
+
+        self.zonas = {
+            "zona_1": (5, 220, 150, 290),
+            "zona_2": (240, 460, 0, 140),
+            "zona_3": (470, 690, 150, 290)
+        }
+
+        self.capacidad_zonas = {
+            "zona_1": 40,
+            "zona_2": 40,
+            "zona_3": 40
+        }
+
+        # Reservas espacio-tiempo. Con Numba la confirmación usa en su lugar sellos
+        # densos por celda (ver _confirmar_movimientos_nb); la tabla queda para la
+        # ruta en Python puro.
         self.tabla_reservas = TablaReservas()
+        self._sello_celda = np.full(grid.shape, -1, dtype=np.int64)
+        self._sello_arista = np.full(grid.shape, -1, dtype=np.int64)
+        self._origen_arista = np.full(grid.shape, -1, dtype=np.int64)
+        # Zonas como arreglos para el kernel (capacidad -1 = sin límite); se arman una vez
+        self._rects_zonas = np.array(tuple(self.zonas.values()), dtype=np.int64).reshape(-1, 4)
+        self._capacidades_zonas = np.array(
+            [-1 if c is None else c for c in (self.capacidad_zonas.get(z, None) for z in self.zonas)],
+            dtype=np.int64,
+        )
 
         # Inicializar robots en puntos spawn únicos
         if len(puntos_spawn) < robots:
             raise RuntimeError("No hay suficientes puntos de spawn para la cantidad de robots.")
-        self.lista_robots: List[Robot] = []
-        for i in range(robots):
-            self.lista_robots.append(Robot(robot_id=i, pos=puntos_spawn[i]))
+        # Estado por robot en arreglos SoA (fila = robot_id)
+        self.pos_robots = np.array(puntos_spawn[:robots], dtype=np.int32).reshape(-1, 2)
+        self.estado_robots = np.full(robots, INACTIVO, dtype=np.int8)
+        self.ticks_espera = np.zeros(robots, dtype=np.int64)
+        self.celdas_movidas = np.zeros(robots, dtype=np.int64)
+        self.ticks_ocupado = np.zeros(robots, dtype=np.int64)
+        self.lista_robots: List[Robot] = [Robot(self, i) for i in range(robots)]
 
         # Reservar posiciones iniciales en tick 0
         for r in self.lista_robots:
@@ -150,100 +449,214 @@ class SimAlmacen:
         self.intercambios_arista = 0
         self.conteo_deadlock = 0
         self.eventos_alto = 0
+        # Acumulados de pedidos completados (metricas() no recorre todos los pedidos)
+        self._completados_n = 0
+        # pedido_id de cada pedido completado por primera vez, en orden; quien
+        # observa la simulación (p. ej. el animador) lo consume y lo vacía
+        self.eventos_completado: List[int] = []
+        self._suma_ticks_pedido = 0
 
-        self.zonas = {
-            "zona_1": (5, 220, 150, 290),
-            "zona_2": (240, 460, 0, 140),
-            "zona_3": (470, 690, 150, 290)
-        }
-
-        self.capacidad_zonas = {
-            "zona_1": 40,
-            "zona_2": 40,
-            "zona_3": 40
-        }
+        # Gestión de pedidos
+        # índices en self.pedidos; dict como conjunto ordenado: alta/baja O(1) y se
+        # conserva el orden de llegada (decide los empates del greedy)
+        self.pendientes: Dict[int, None] = {}
+        self.no_liberados: Deque[int] = deque(
+            sorted(range(len(self.pedidos)), key=lambda i: self.pedidos[i].tick_creacion)
+        )
+
+    def _guardar_ruta(self, llave: Tuple[Celda, Celda], ruta: Optional[List[Celda]]) -> Optional[Ruta]:
+        # Tupla inmutable: la misma ruta cacheada puede compartirse entre robots
+        ruta_t = tuple(ruta) if ruta is not None else None
+        self._rutas[llave] = ruta_t
+        if len(self._rutas) > MAX_RUTAS_CACHE:
+            self._rutas.popitem(last=False)
+        return ruta_t
+
+    def rutear(self, inicio: Celda, meta: Celda) -> Optional[Ruta]:
+        """Ruta A* (o JPS) de inicio a meta (None si no hay), consultando primero la caché."""
+        llave = (inicio, meta)
+        if llave in self._rutas:
+            self._rutas.move_to_end(llave)
+            return self._rutas[llave]
+        return self._guardar_ruta(llave, self._planear(inicio, meta))
+
+    def _planear(self, inicio: Celda, meta: Celda) -> Optional[List[Celda]]:
+        if self.usar_jps:
+            return a_estrella_jps_nb(self.passable, inicio, meta, self.tablas_jps, self._espacio_jps)
+        return a_estrella_nb(self.passable, inicio, meta, self.passable_bits, self._espacio)
+
+    def _rutear_lote(self, pares: List[Tuple[Celda, Celda]]) -> List[Optional[Ruta]]:
+        """Como rutear() para varios pares; los que no están en caché se planean en lote."""
+        rutas: List[Optional[Ruta]] = [None] * len(pares)
+        faltantes: List[int] = []
+        for k, llave in enumerate(pares):
+            if llave in self._rutas:
+                self._rutas.move_to_end(llave)
+                rutas[k] = self._rutas[llave]
+            else:
+                faltantes.append(k)
 
+        if faltantes:
+            if self.usar_jps:
+                # Con las tablas de salto cada búsqueda es corta: en serie basta
+                nuevas = [self._planear(*pares[k]) for k in faltantes]
+            else:
+                nuevas = a_estrella_lote(
+                    self.passable,
+                    [pares[k][0] for k in faltantes],
+                    [pares[k][1] for k in faltantes],
+                    self.passable_bits,
+                    self._espacio,
+                )
+            for k, ruta in zip(faltantes, nuevas):
+                rutas[k] = self._guardar_ruta(pares[k], ruta)
+        return rutas
 
-        # Gestión de pedidos
-        self.pendientes: List[int] = []  # índices en self.pedidos
-        self.no_liberados = sorted(range(len(self.pedidos)), key=lambda i: self.pedidos[i].tick_creacion)
+    def _pickup(self, anaquel_id: int) -> Optional[Celda]:
+        x, y = self.pickup_por_anaquel[anaquel_id].tolist()
+        return (x, y) if x >= 0 else None
 
     def _liberar_pedidos(self) -> None:
         while self.no_liberados and self.pedidos[self.no_liberados[0]].tick_creacion <= self.tick:
-            idx = self.no_liberados.pop(0)
-            self.pendientes.append(idx)
+            idx = self.no_liberados.popleft()
+            self.pendientes[idx] = None
 
     def _asignar_pedidos(self) -> None:
         # Greedy: para cada robot inactivo, asignar el anaquel más cercano a una celda adyacente de recolección
-        inactivos = [r for r in self.lista_robots if r.estado == "INACTIVO"]
-        if (not inactivos) or (not self.pendientes):
-            return
+        inactivos = [self.lista_robots[i] for i in np.flatnonzero(self.estado_robots == INACTIVO).tolist()]
+        while inactivos and self.pendientes:
+            elegidos = self._elegir_pedidos(inactivos)
+            if not elegidos:
+                return
 
-        for r in inactivos:
-            if not self.pendientes:
-                break
+            # Las rutas robot -> recolección son independientes entre sí: se planean en lote
+            rutas = self._rutear_lote([(inactivos[k].pos, pickup) for k, _, pickup in elegidos])
+            for (k, idx, pickup), ruta in zip(elegidos, rutas):
+                if ruta is None:
+                    # No alcanzable: el robot queda libre en este tick y el pedido conserva
+                    # su lugar en la cola. Las elecciones de los robots siguientes se hicieron
+                    # sin ese pedido, así que se repiten con él disponible, igual que cuando
+                    # cada ruta se planeaba dentro del recorrido
+                    inactivos = inactivos[k + 1:]
+                    break
+
+                r = inactivos[k]
+                p = self.pedidos[idx]
+                p.tick_asignacion = self.tick
+                del self.pendientes[idx]
+
+                r.pedido_id = p.pedido_id
+                r.anaquel_home = _celda(self.anaquel_home, p.anaquel_id)
+                r.estacion_dock = _celda(self.estacion_dock, p.estacion_id)
+                r.estado = "A_RECOGER"
+                r.pickup = pickup
+                r.ruta = ruta
+                r.idx_ruta = 0
+            else:
+                return
 
-            mejor_idx: Optional[int] = None
-            mejor_dist = 10**9
+    def _elegir_pedidos(self, inactivos: List[Robot]) -> List[Tuple[int, int, Celda]]:
+        """
+        Elige pedido para los robots inactivos, en orden, sin modificar estado:
+        regresa (k, idx, pickup) por robot con pedido, donde k es su posición en
+        inactivos e idx el índice del pedido en self.pedidos.
+        """
+        # Candidatos con pickup, en orden de llegada: argmin regresa el primer mínimo,
+        # igual que el recorrido secuencial con "<"
+        cand = np.fromiter(self.pendientes, dtype=np.intp, count=len(self.pendientes))
+        cand = cand[self._con_pickup[cand]]
+        cand_x = self._pickup_pedido[cand, 0]
+        cand_y = self._pickup_pedido[cand, 1]
+        cand_rack_estacion = self._dist_rack_estacion[cand]
+        tomado = 10**9  # distancia centinela para candidatos ya elegidos en esta llamada
+
+        # Con asignacion="bfs" el costo usa la distancia real: una búsqueda desde todas
+        # las celdas de recolección (cada una con su tramo anaquel -> estación como
+        # costo inicial) etiqueta cada celda con su candidato más barato. Solo se
+        # repite cuando el candidato de un robot ya fue tomado en este tick.
+        origen_bfs: Optional[np.ndarray] = None
+
+        # Con asignacion="hungaro" se resuelve de una vez la asignación robots x
+        # candidatos de costo total mínimo (mismo costo Manhattan que el greedy),
+        # en lugar de que cada robot tome su mejor candidato en orden
+        eleccion: Dict[int, int] = {}
+        if self.asignacion == "hungaro" and cand.size:
+            pos = self.pos_robots[[r.robot_id for r in inactivos]].astype(np.int64)
+            costo = (
+                np.abs(pos[:, 0:1] - cand_x) + np.abs(pos[:, 1:2] - cand_y) + cand_rack_estacion
+            )
+            filas, columnas = linear_sum_assignment(costo)
+            eleccion = dict(zip(filas.tolist(), columnas.tolist()))
+
+        elegidos: List[Tuple[int, int, Celda]] = []
+        libres = cand.size
+        for k, r in enumerate(inactivos):
+            if libres == 0:
+                break
 
-            # Considerar solo los primeros N en cola (localidad / performance)
-            for pi in self.pendientes:
-                p = self.pedidos[pi]
-                anaquel = self.anaquel_home[p.anaquel_id]
-                pickup = elegir_objetivo_adyacente(self.grid, anaquel)
-                if pickup is None:
+            px, py = r.pos
+            if self.asignacion == "hungaro":
+                j = eleccion.get(k, -1)
+                if j < 0:
                     continue
-                dist_robot_rack = abs(r.pos[0] - pickup[0]) + abs(r.pos[1] - pickup[1])
-                dist_rack_estacion = abs(pickup[0] - self.estacion_dock[p.estacion_id][0]) + abs(pickup[1] - self.estacion_dock[p.estacion_id][1])
-                dist = dist_robot_rack + dist_rack_estacion
-
-                if dist < mejor_dist:
-                    mejor_dist = dist
-                    mejor_idx = pi
-
-            if mejor_idx is None:
-                continue
-
-            p = self.pedidos[mejor_idx]
-            p.tick_asignacion = self.tick
-            self.pendientes.remove(mejor_idx)
-
-            r.pedido_id = p.pedido_id
-            r.anaquel_home = self.anaquel_home[p.anaquel_id]
-            r.estacion_dock = self.estacion_dock[p.estacion_id]
-            r.estado = "A_RECOGER"
-
-            pickup = elegir_objetivo_adyacente(self.grid, r.anaquel_home)
-            if pickup is None:
-                # No debería ocurrir si la lista de anaqueles es válida; revertir asignación
-                r.estado = "INACTIVO"
-                r.pedido_id = None
-                r.anaquel_home = None
-                r.estacion_dock = None
-                p.tick_asignacion = None
-                self.pendientes.append(mejor_idx)
-                continue
+            elif self.asignacion == "bfs":
+                if origen_bfs is None or (
+                    origen_bfs[py, px] >= 0 and cand_rack_estacion[origen_bfs[py, px]] >= tomado
+                ):
+                    origen_bfs = self._etiquetar_candidatos(
+                        cand_x, cand_y, cand_rack_estacion, [rr.pos for rr in inactivos[k:]], tomado
+                    )
+                j = int(origen_bfs[py, px])
+                if j < 0:
+                    continue
+            else:
+                dist = np.abs(cand_x - px) + np.abs(cand_y - py) + cand_rack_estacion
+                j = int(dist.argmin())
+                if dist[j] >= tomado:
+                    continue
+            cand_rack_estacion[j] = tomado
+            libres -= 1
+            mejor_idx = int(cand[j])
+            # Los candidatos sin pickup ya se descartaron arriba
+            elegidos.append((k, mejor_idx, self._pickup(self.pedidos[mejor_idx].anaquel_id)))
 
-            ruta = a_estrella(self.grid, r.pos, pickup)
-            if ruta is None:
-                # No alcanzable; revertir asignación
-                r.estado = "INACTIVO"
-                r.pedido_id = None
-                r.anaquel_home = None
-                r.estacion_dock = None
-                p.tick_asignacion = None
-                self.pendientes.append(mejor_idx)
-                continue
+        return elegidos
 
-            r.ruta = ruta
-            r.idx_ruta = 0
+    def _etiquetar_candidatos(
+        self,
+        cand_x: np.ndarray,
+        cand_y: np.ndarray,
+        cand_rack_estacion: np.ndarray,
+        objetivos: List[Celda],
+        tomado: int,
+    ) -> np.ndarray:
+        """
+        Índice del candidato (aún no tomado) de menor costo real desde cada celda
+        objetivo: pasos hasta su recolección más el tramo anaquel -> estación.
+        -1 si ninguno es alcanzable. Los empates van al de menor índice, igual que argmin.
+        """
+        vivos = np.flatnonzero(cand_rack_estacion < tomado)
+        _, origen = bfs_multi_fuente(
+            self.passable,
+            np.stack([cand_x[vivos], cand_y[vivos]], axis=1),
+            cand_rack_estacion[vivos],
+            objetivos,
+            self.passable_bits,
+        )
+        return np.where(origen >= 0, vivos[np.maximum(origen, 0)], -1)
 
     def _completar_pedido(self, pedido_id: int) -> None:
-        # Buscar pedido por ID (O(n) con 600 pedidos es aceptable).
-        for p in self.pedidos:
-            if p.pedido_id == pedido_id:
-                p.tick_completado = self.tick
-                return
+        idx = self._idx_por_pedido_id.get(pedido_id)
+        if idx is None:
+            return
+        p = self.pedidos[idx]
+        if p.tick_completado is None:
+            self._completados_n += 1
+            self.eventos_completado.append(p.pedido_id)
+            self._suma_ticks_pedido += self.tick - p.tick_creacion
+        else:
+            self._suma_ticks_pedido += self.tick - p.tick_completado
+        p.tick_completado = self.tick
 
     def _planear_siguiente_tramo_si_llego(self, r: Robot) -> None:
         if (not r.ruta) or (r.idx_ruta != len(r.ruta) - 1):
@@ -251,7 +664,7 @@ class SimAlmacen:
 
         if r.estado == "A_RECOGER":
             r.estado = "A_ESTACION"
-            ruta = a_estrella(self.grid, r.pos, r.estacion_dock)
+            ruta = self.rutear(r.pos, r.estacion_dock)
             if ruta is None:
                 # reintentar después
                 r.estado = "A_RECOGER"
@@ -261,11 +674,10 @@ class SimAlmacen:
 
         elif r.estado == "A_ESTACION":
             r.estado = "RETORNO"
-            pickup = elegir_objetivo_adyacente(self.grid, r.anaquel_home) if r.anaquel_home else None
-            if pickup is None:
+            if r.pickup is None:
                 r.estado = "A_ESTACION"
                 return
-            ruta = a_estrella(self.grid, r.pos, pickup)
+            ruta = self.rutear(r.pos, r.pickup)
             if ruta is None:
                 r.estado = "A_ESTACION"
                 return
@@ -279,6 +691,7 @@ class SimAlmacen:
             r.estado = "INACTIVO"
             r.pedido_id = None
             r.anaquel_home = None
+            r.pickup = None
             r.estacion_dock = None
             r.ruta = []
             r.idx_ruta = 0
@@ -291,104 +704,120 @@ class SimAlmacen:
         return None
 
 
-    def step(self) -> None:
-        self._liberar_pedidos()
-        self._asignar_pedidos()
-
-        # Proponer movimientos
-        propuestas: Dict[int, Celda] = {}
+    def _proponer_movimientos(self) -> Tuple[List[Celda], List[Celda]]:
+        """Replanea tramos terminados y regresa (posiciones, propuestas) por robot."""
+        # Posiciones como tuplas de int de Python
+        posiciones: List[Celda] = [(x, y) for x, y in self.pos_robots.tolist()]
+        estados = self.estado_robots.tolist()
+        propuestas: List[Celda] = []
         for r in self.lista_robots:
-            if r.estado != "INACTIVO":
-                r.ticks_ocupado += 1
-
-            self._planear_siguiente_tramo_si_llego(r)
-
-            if r.estado == "INACTIVO" or (not r.ruta):
-                propuestas[r.robot_id] = r.pos
-                continue
-
-            if r.idx_ruta < len(r.ruta) - 1:
-                propuestas[r.robot_id] = r.ruta[r.idx_ruta + 1]
+            i = r.robot_id
+            ruta = r.ruta
+            if ruta and r.idx_ruta == len(ruta) - 1:
+                self._planear_siguiente_tramo_si_llego(r)
+                ruta = r.ruta
+                estados[i] = int(self.estado_robots[i])
+
+            if (not ruta) or estados[i] == INACTIVO or r.idx_ruta >= len(ruta) - 1:
+                propuestas.append(posiciones[i])
             else:
-                propuestas[r.robot_id] = r.pos
-
-        tick_siguiente = self.tick + 1
-        movio_alguien = False
-
+                propuestas.append(ruta[r.idx_ruta + 1])
+        return posiciones, propuestas
+
+    def _confirmar_movimientos(
+        self, posiciones: List[Celda], propuestas: List[Celda], tick_siguiente: int
+    ) -> Tuple[List[int], List[int]]:
+        """
+        Confirmación en Python puro con la tabla de reservas (orden determinista).
+        Regresa (movidos, bloqueados): índices de robots.
+        """
         # =====================================================
         # Conteo actual de robots por zona
         # =====================================================
-        conteo_zonas = {z: 0 for z in self.zonas}
-
-        for robot in self.lista_robots:
-            zona = self.obtener_zona(robot.pos)
-            if zona:
-                conteo_zonas[zona] += 1
-
-        # =====================================================
-        # Confirmación de movimientos (orden determinista)
-        # =====================================================
-        for r in self.lista_robots:
-            actual = r.pos
-            siguiente = propuestas[r.robot_id]
-
+        rects = tuple(self.zonas.values())
+        capacidades = [self.capacidad_zonas.get(z, None) for z in self.zonas]
+        conteo_zonas = _conteo_por_zona(self.pos_robots, rects)
+
+        reservas = self.tabla_reservas
+        movidos: List[int] = []
+        bloqueados: List[int] = []
+        for i, (actual, siguiente) in enumerate(zip(posiciones, propuestas)):
             if siguiente == actual:
-                self.tabla_reservas.confirmar_espera(
-                    r.robot_id, actual, tick_siguiente
-                )
+                reservas.confirmar_espera(i, actual, tick_siguiente)
                 continue
 
-            if self.tabla_reservas.puede_moverse(actual, siguiente, tick_siguiente):
+            if reservas.puede_moverse(actual, siguiente, tick_siguiente):
 
-                zona_actual = self.obtener_zona(actual)
-                zona_siguiente = self.obtener_zona(siguiente)
+                zona_actual = _zona_de(actual, rects)
+                zona_siguiente = _zona_de(siguiente, rects)
 
                 # -------------------------------------------------
                 # Control de capacidad de zona (solo entrada)
                 # -------------------------------------------------
-                if zona_siguiente and zona_actual != zona_siguiente:
-                    capacidad = self.capacidad_zonas.get(zona_siguiente, None)
+                if zona_siguiente >= 0 and zona_actual != zona_siguiente:
+                    capacidad = capacidades[zona_siguiente]
 
                     if (
                         capacidad is not None
                         and conteo_zonas[zona_siguiente] >= capacidad
                     ):
-                        r.ticks_espera += 1
-                        self.eventos_alto += 1
-                        self.tabla_reservas.confirmar_espera(
-                            r.robot_id, actual, tick_siguiente
-                        )
+                        bloqueados.append(i)
+                        reservas.confirmar_espera(i, actual, tick_siguiente)
                         continue
 
                 # -------------------------------------------------
                 # Movimiento confirmado
                 # -------------------------------------------------
-                self.tabla_reservas.confirmar_movimiento(
-                    r.robot_id, actual, siguiente, tick_siguiente
-                )
+                reservas.confirmar_movimiento(i, actual, siguiente, tick_siguiente)
 
                 # Actualizar conteo después del movimiento
-                if zona_actual and zona_actual != zona_siguiente:
+                if zona_actual >= 0 and zona_actual != zona_siguiente:
                     conteo_zonas[zona_actual] -= 1
 
-                if zona_siguiente and zona_actual != zona_siguiente:
+                if zona_siguiente >= 0 and zona_actual != zona_siguiente:
                     conteo_zonas[zona_siguiente] += 1
 
-                r.pos = siguiente
-                r.idx_ruta += 1
-                r.celdas_movidas += 1
-                movio_alguien = True
+                movidos.append(i)
 
             else:
-                r.ticks_espera += 1
-                self.eventos_alto += 1
-                self.tabla_reservas.confirmar_espera(
-                    r.robot_id, actual, tick_siguiente
-                )
+                bloqueados.append(i)
+                reservas.confirmar_espera(i, actual, tick_siguiente)
+
+        return movidos, bloqueados
 
-        if (not movio_alguien) and any(
-            r.estado != "INACTIVO" for r in self.lista_robots
-        ):
+    def step(self) -> None:
+        self._liberar_pedidos()
+        self._asignar_pedidos()
+
+        # Cada robot cuenta como ocupado según su estado antes de replanear su tramo
+        self.ticks_ocupado += self.estado_robots != INACTIVO
+
+        posiciones, propuestas = self._proponer_movimientos()
+        tick_siguiente = self.tick + 1
+
+        if NUMBA_DISPONIBLE:
+            movido, bloqueado = _confirmar_movimientos_nb(
+                self.pos_robots, np.array(propuestas, dtype=np.int32).reshape(-1, 2),
+                self._rects_zonas, self._capacidades_zonas,
+                self._sello_celda, self._sello_arista, self._origen_arista, tick_siguiente,
+            )
+            movidos = np.flatnonzero(movido).tolist()
+            bloqueados = np.flatnonzero(bloqueado).tolist()
+        else:
+            # Solo se consultan reservas de tick_siguiente; las de ticks anteriores sobran
+            self.tabla_reservas.purgar(self.tick)
+            movidos, bloqueados = self._confirmar_movimientos(posiciones, propuestas, tick_siguiente)
+
+        # Cada robot aparece a lo más una vez en cada lista: basta la indexación avanzada
+        self.eventos_alto += len(bloqueados)
+        if bloqueados:
+            self.ticks_espera[bloqueados] += 1
+        if movidos:
+            self.pos_robots[movidos] = [propuestas[i] for i in movidos]
+            self.celdas_movidas[movidos] += 1
+            for i in movidos:
+                self.lista_robots[i].idx_ruta += 1
+        elif bool(np.any(self.estado_robots != INACTIVO)):
             self.conteo_deadlock += 1
 
         self.tick = tick_siguiente
@@ -398,25 +827,61 @@ class SimAlmacen:
         for _ in range(ticks):
             self.step()
 
+    def step_many(
+        self,
+        n: int,
+        visitas: Optional[np.ndarray] = None,
+        esperas: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Avanza n ticks. Si se dan, acumula en los heatmaps (alto, ancho):
+          - visitas[y, x]: +1 por cada robot en (x, y) al final de cada tick,
+          - esperas[y, x]: +1 si además el robot no se movió en ese tick.
+
+        Las posiciones se guardan en un búfer (n+1, R, 2) y los heatmaps se
+        actualizan una sola vez al final, con np.add.at, en lugar de tick por tick.
+        """
+        if n <= 0:
+            return
+        if visitas is None and esperas is None:
+            self.run(n)
+            return
+
+        # int16 basta para grids de hasta 32767 celdas por lado
+        dtype = np.int16 if max(self.grid.shape) <= np.iinfo(np.int16).max else self.pos_robots.dtype
+        trayectoria = np.empty((n + 1,) + self.pos_robots.shape, dtype=dtype)
+        trayectoria[0] = self.pos_robots
+        for k in range(1, n + 1):
+            self.step()
+            trayectoria[k] = self.pos_robots
+
+        cur = trayectoria[1:].reshape(-1, 2)
+        alto, ancho = self.grid.shape
+        dentro = (cur[:, 0] >= 0) & (cur[:, 0] < ancho) & (cur[:, 1] >= 0) & (cur[:, 1] < alto)
+        if visitas is not None:
+            np.add.at(visitas, (cur[dentro, 1], cur[dentro, 0]), 1)
+        if esperas is not None:
+            quieto = dentro & (trayectoria[1:] == trayectoria[:-1]).all(axis=2).reshape(-1)
+            np.add.at(esperas, (cur[quieto, 1], cur[quieto, 0]), 1)
+
     def obtener_posiciones_robots(self) -> List[Celda]:
-        return [r.pos for r in self.lista_robots]
+        return [(x, y) for x, y in self.pos_robots.tolist()]
 
     def obtener_estados_robots(self) -> List[str]:
-        return [r.estado for r in self.lista_robots]
+        return [ESTADOS[e] for e in self.estado_robots.tolist()]
 
     def obtener_ids_robots(self) -> List[int]:
         return [r.robot_id for r in self.lista_robots]
 
     def metricas(self) -> Dict:
-        completados = [p for p in self.pedidos if p.tick_completado is not None]
-        completados_n = len(completados)
+        completados_n = self._completados_n
 
         tiempo_promedio_pedido = None
         if completados_n > 0:
-            tiempo_promedio_pedido = float(np.mean([(p.tick_completado - p.tick_creacion) for p in completados]))
+            tiempo_promedio_pedido = self._suma_ticks_pedido / completados_n
 
-        utilizacion = [r.ticks_ocupado / max(1, self.tick) for r in self.lista_robots]
-        ticks_espera = [r.ticks_espera for r in self.lista_robots]
+        n_robots = len(self.lista_robots)
+        utilizacion = self.ticks_ocupado / max(1, self.tick)
 
         throughput = 0.0
         if self.tick > 0:
@@ -425,16 +890,16 @@ class SimAlmacen:
         return {
             "seed": self.seed,
             "tick_final": self.tick,
-            "robots": len(self.lista_robots),
+            "robots": n_robots,
             "pedidos_totales": len(self.pedidos),
             "pedidos_completados": completados_n,
             "tiempo_promedio_pedido_ticks": tiempo_promedio_pedido,
             "throughput_pedidos_por_1000_ticks": throughput,
-            "tiempo_promedio_espera_ticks": float(np.mean(ticks_espera)) if ticks_espera else 0.0,
-            "utilizacion_promedio": float(np.mean(utilizacion)) if utilizacion else 0.0,
+            "tiempo_promedio_espera_ticks": float(np.mean(self.ticks_espera)) if n_robots else 0.0,
+            "utilizacion_promedio": float(np.mean(utilizacion)) if n_robots else 0.0,
             "colisiones_vertice": self.colisiones_vertice,
             "intercambios_arista": self.intercambios_arista,
             "deadlock": self.conteo_deadlock,
             "eventos_alto": self.eventos_alto,
-            "distancia_total_celdas": int(sum(r.celdas_movidas for r in self.lista_robots)),
+            "distancia_total_celdas": int(self.celdas_movidas.sum()),
         }
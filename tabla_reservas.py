@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 
 Celda = Tuple[int, int]
 
@@ -18,31 +18,63 @@ class TablaReservas:
     - Se reserva la arista dirigida (actual -> siguiente) en tick_siguiente.
     - Para evitar swaps, se rechaza el movimiento si la arista opuesta
       (siguiente -> actual) ya está reservada en tick_siguiente.
+
+    Las llaves son enteros empacados (16 bits por coordenada, el tick en los bits
+    altos) en lugar de tuplas: un solo hash de int y ninguna tupla por consulta.
+    Requiere coordenadas int de Python (no escalares de NumPy) en [0, 65536).
     """
 
     def __init__(self) -> None:
-        # (x, y, t) -> robot_id
-        self.reserva_celdas: Dict[Tuple[int, int, int], int] = {}
-        # (x1, y1, x2, y2, t) -> robot_id  (reserva de arista dirigida)
-        self.reserva_aristas: Dict[Tuple[int, int, int, int, int], int] = {}
+        # (t << 32 | x << 16 | y) -> robot_id
+        self.reserva_celdas: Dict[int, int] = {}
+        # (t << 64 | x1 << 48 | y1 << 32 | x2 << 16 | y2) -> robot_id  (reserva de arista dirigida)
+        self.reserva_aristas: Dict[int, int] = {}
+        # t -> llaves reservadas en ese tick (una lista por tick, no una tupla por
+        # reserva), para purgar ticks ya pasados de un solo golpe
+        self._celdas_por_tick: Dict[int, List[int]] = {}
+        self._aristas_por_tick: Dict[int, List[int]] = {}
 
     def celda_libre(self, celda: Celda, tick: int) -> bool:
-        x, y = celda
-        return (x, y, tick) not in self.reserva_celdas
+        return ((tick << 32) | (celda[0] << 16) | celda[1]) not in self.reserva_celdas
 
     def reservar_celda(self, robot_id: int, celda: Celda, tick: int) -> None:
-        x, y = celda
-        self.reserva_celdas[(x, y, tick)] = robot_id
+        llave = (tick << 32) | (celda[0] << 16) | celda[1]
+        self.reserva_celdas[llave] = robot_id
+        llaves = self._celdas_por_tick.get(tick)
+        if llaves is None:
+            llaves = self._celdas_por_tick[tick] = []
+        llaves.append(llave)
 
     def arista_libre(self, a: Celda, b: Celda, tick: int) -> bool:
-        x1, y1 = a
-        x2, y2 = b
-        return (x1, y1, x2, y2, tick) not in self.reserva_aristas
+        llave = (tick << 64) | (a[0] << 48) | (a[1] << 32) | (b[0] << 16) | b[1]
+        return llave not in self.reserva_aristas
 
     def reservar_arista(self, robot_id: int, a: Celda, b: Celda, tick: int) -> None:
-        x1, y1 = a
-        x2, y2 = b
-        self.reserva_aristas[(x1, y1, x2, y2, tick)] = robot_id
+        llave = (tick << 64) | (a[0] << 48) | (a[1] << 32) | (b[0] << 16) | b[1]
+        self.reserva_aristas[llave] = robot_id
+        llaves = self._aristas_por_tick.get(tick)
+        if llaves is None:
+            llaves = self._aristas_por_tick[tick] = []
+        llaves.append(llave)
+
+    def purgar(self, tick_min: int) -> None:
+        """
+        Elimina las reservas con t < tick_min (nadie consulta ticks pasados).
+
+        Supone que las reservas se hacen en ticks no decrecientes, como en
+        SimAlmacen.step: los grupos por tick quedan en orden de inserción y basta
+        descartar los del frente. La memoria queda acotada a unos cuantos ticks.
+        """
+        for por_tick, reservas in (
+            (self._celdas_por_tick, self.reserva_celdas),
+            (self._aristas_por_tick, self.reserva_aristas),
+        ):
+            while por_tick:
+                t = next(iter(por_tick))
+                if t >= tick_min:
+                    break
+                for llave in por_tick.pop(t):
+                    reservas.pop(llave, None)
 
     def puede_moverse(self, actual: Celda, siguiente: Celda, tick_siguiente: int) -> bool:
         """
@@ -1,15 +1,15 @@
 #!/usr/bin/env python3
 import argparse
-import json
 import os
-from typing import List, Tuple, Dict
+from typing import List, Optional, Tuple, Dict
 import numpy as np
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from matplotlib import animation
 from matplotlib.patches import Rectangle
+from json_io import leer_json
 from out_paths import asegurar_dirs_de_salidas
-from sim_core import Pedido, SimAlmacen, cargar_layout
+from sim_core import ASIGNACIONES, ESTADOS, Pedido, SimAlmacen, cargar_layout, pedidos_desde_tabla, tabla_pedidos
 from scenario_config import agregar_argumento_config, aplicar_defaults_desde_config
 
 LIBRE = 0
@@ -35,20 +35,8 @@ def cargar_pedidos(ruta: str) -> List[Pedido]:
         ]
       }
     """
-    with open(ruta, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    pedidos: List[Pedido] = []
-    for p in data.get("pedidos", []):
-        pedidos.append(
-            Pedido(
-                pedido_id=int(p["pedido_id"]),
-                anaquel_id=int(p["anaquel_id"]),
-                estacion_id=int(p["estacion_id"]),
-                tick_creacion=int(p.get("tick_creacion", 0)),
-            )
-        )
-    return pedidos
+    data = leer_json(ruta)
+    return pedidos_desde_tabla(tabla_pedidos(data.get("pedidos", [])))
 
 
 def normalizar_ticks_pedidos(pedidos: List[Pedido]) -> List[Pedido]:
@@ -65,21 +53,33 @@ def normalizar_ticks_pedidos(pedidos: List[Pedido]) -> List[Pedido]:
     return pedidos
 
 
-def graficar_layout(grid: np.ndarray, salida_png: str) -> None:
+def imagen_layout(grid: np.ndarray) -> np.ndarray:
     """
-    Visualización estática del layout.
-    Escala de grises:
+    Imagen float32 del layout, en escala de grises:
       LIBRE     -> blanco
       ESTACION  -> gris claro
       ANAQUEL   -> gris oscuro
       BLOQUEADO -> negro
+
+    main la construye una vez por corrida y la pasa a graficar_layout y animar
+    (no modificarla).
     """
-    img = np.zeros_like(grid, dtype=float)
+    img = np.zeros(grid.shape, dtype=np.float32)
     img[grid == LIBRE] = 1.0
     img[grid == ESTACION] = 0.7
     img[grid == ANAQUEL] = 0.35
     img[grid == BLOQUEADO] = 0.0
 
+    return img
+
+
+def graficar_layout(grid: np.ndarray, salida_png: str, img: Optional[np.ndarray] = None) -> None:
+    """
+    Visualización estática del layout (ver imagen_layout; img la reutiliza si ya existe).
+    """
+    if img is None:
+        img = imagen_layout(grid)
+
     plt.figure(figsize=(10, 7))
     plt.title("Layout CEDIS")
     plt.imshow(img, origin="upper", interpolation="nearest")
@@ -94,53 +94,56 @@ def guardar_heatmaps(
     grid: np.ndarray, visitas: np.ndarray, esperas: np.ndarray, prefijo: str = "heatmap"
 ) -> None:
     """
-    Escribe:
+    Escribe (un pixel por celda, colormap viridis):
       - <prefijo>_visitas.png : conteo de visitas a celdas (intensidad de tráfico)
       - <prefijo>_esperas.png : conteo de eventos de espera (bloqueo/congestión)
       - <prefijo>_ratio.png   : esperas/visitas (congestión relativa)
+      - <prefijo>_leyenda.png : escala de color de cada heatmap
+
+    Las imágenes se guardan directo con plt.imsave (sin figura, ejes ni colorbar);
+    la escala, que antes iba en cada figura, queda en la leyenda.
     """
-    transitable = (grid == LIBRE) | (grid == ESTACION)
+    # Fuera de las celdas transitables los conteos se anulan en copias (sin np.where)
+    bloqueada = (grid != LIBRE) & (grid != ESTACION)
 
-    # Heatmap visitas
-    v = np.where(transitable, visitas, 0)
-    plt.figure(figsize=(10, 7))
-    plt.title("Heatmap: Visitas a celdas (intensidad de tráfico)")
-    plt.imshow(v, origin="upper", interpolation="nearest")
-    plt.xlabel("x")
-    plt.ylabel("y")
-    plt.colorbar()
-    plt.tight_layout()
-    plt.savefig(f"{prefijo}_visitas.png", dpi=200)
-    plt.close()
+    v = visitas.copy()
+    v[bloqueada] = 0
+    e = esperas.copy()
+    e[bloqueada] = 0
 
-    # Heatmap esperas
-    e = np.where(transitable, esperas, 0)
-    plt.figure(figsize=(10, 7))
-    plt.title("Heatmap: Esperas (congestión / bloqueo)")
-    plt.imshow(e, origin="upper", interpolation="nearest")
-    plt.xlabel("x")
-    plt.ylabel("y")
-    plt.colorbar()
-    plt.tight_layout()
-    plt.savefig(f"{prefijo}_esperas.png", dpi=200)
-    plt.close()
-
-    # Heatmap ratio
+    # Ratio (ya es 0 en celdas bloqueadas: ahí v == 0)
     ratio = np.zeros_like(e, dtype=float)
     mask = v > 0
     ratio[mask] = e[mask] / v[mask]
 
-    plt.figure(figsize=(10, 7))
-    plt.title("Heatmap: Ratio Espera/Visita (congestión relativa)")
-    plt.imshow(np.where(transitable, ratio, 0.0), origin="upper", interpolation="nearest")
-    plt.xlabel("x")
-    plt.ylabel("y")
-    plt.colorbar()
-    plt.tight_layout()
-    plt.savefig(f"{prefijo}_ratio.png", dpi=200)
-    plt.close()
+    heatmaps = [
+        ("visitas", "Visitas a celdas (intensidad de tráfico)", v),
+        ("esperas", "Esperas (congestión / bloqueo)", e),
+        ("ratio", "Ratio Espera/Visita (congestión relativa)", ratio),
+    ]
+    for nombre, _, datos in heatmaps:
+        plt.imsave(f"{prefijo}_{nombre}.png", datos, cmap="viridis", origin="upper")
 
-    print(f"[OK] Heatmaps escritos: {prefijo}_visitas.png, {prefijo}_esperas.png, {prefijo}_ratio.png")
+    _guardar_leyenda_heatmaps(heatmaps, f"{prefijo}_leyenda.png")
+
+    print(
+        f"[OK] Heatmaps escritos: {prefijo}_visitas.png, {prefijo}_esperas.png, "
+        f"{prefijo}_ratio.png (escalas en {prefijo}_leyenda.png)"
+    )
+
+
+def _guardar_leyenda_heatmaps(heatmaps: List[Tuple[str, str, np.ndarray]], salida_png: str) -> None:
+    """Una figura pequeña con la barra de color (rango min..max) de cada heatmap."""
+    fig, axes = plt.subplots(len(heatmaps), 1, figsize=(6, 1.2 * len(heatmaps)))
+    for ax, (_, titulo, datos) in zip(np.atleast_1d(axes), heatmaps):
+        norm = mpl.colors.Normalize(vmin=float(datos.min()), vmax=float(datos.max()))
+        fig.colorbar(
+            mpl.cm.ScalarMappable(norm=norm, cmap="viridis"), cax=ax, orientation="horizontal"
+        )
+        ax.set_title(f"Heatmap: {titulo}", fontsize=9)
+    fig.tight_layout()
+    fig.savefig(salida_png, dpi=100)
+    plt.close(fig)
 
 
 def _mapa_colores_estados() -> Tuple[Dict[str, float], mpl.colors.Colormap, mpl.colors.Normalize]:
@@ -168,22 +171,20 @@ def animar(
     salida_video: str,
     fps: int,
     prefijo_heatmap: str,
+    img_layout: Optional[np.ndarray] = None,
 ) -> None:
     alto, ancho = grid.shape
 
     visitas = np.zeros((alto, ancho), dtype=np.int32)
     esperas = np.zeros((alto, ancho), dtype=np.int32)
 
-    img = np.zeros_like(grid, dtype=float)
-    img[grid == LIBRE] = 1.0
-    img[grid == ESTACION] = 0.7
-    img[grid == ANAQUEL] = 0.35
-    img[grid == BLOQUEADO] = 0.0
+    if img_layout is None:
+        img_layout = imagen_layout(grid)
 
     fig = plt.figure(figsize=(10, 7))
     ax = plt.gca()
     ax.set_title("Simulación de flota de robots (CEDIS)")
-    ax.imshow(img, origin="upper", interpolation="nearest")
+    ax.imshow(img_layout, origin="upper", interpolation="nearest")
     # -------------------------------------------------
     # Dibujar zonas (si existen en el simulador)
     # -------------------------------------------------
@@ -225,60 +226,39 @@ def animar(
     ax.set_ylabel("y")
 
     estado_a_val, cmap, norm = _mapa_colores_estados()
+    # Valor de color por código de estado (sim.estado_robots): una indexación por frame
+    cval_por_codigo = np.array([estado_a_val.get(s, 0.0) for s in ESTADOS], dtype=np.float32)
 
-    posiciones = sim.obtener_posiciones_robots()
-    xs = [p[0] for p in posiciones]
-    ys = [p[1] for p in posiciones]
-    estados = sim.obtener_estados_robots()
-    cvals = [estado_a_val.get(s, 0.0) for s in estados]
-
-    scat = ax.scatter(xs, ys, s=30, c=cvals, cmap=cmap, norm=norm)
+    # Solo scat y texto cambian entre frames (animated=True: fuera del fondo estático)
+    scat = ax.scatter(
+        sim.pos_robots[:, 0], sim.pos_robots[:, 1], s=30,
+        c=cval_por_codigo[sim.estado_robots], cmap=cmap, norm=norm, animated=True,
+    )
 
     cbar = plt.colorbar(scat, ax=ax, fraction=0.046, pad=0.04)
     cbar.set_ticks([0, 1, 2, 3])
     cbar.set_ticklabels(["INACTIVO", "A_RECOGER", "A_ESTACION", "RETORNO"])
 
-    texto = ax.text(0.02, 0.98, "", transform=ax.transAxes, va="top")
+    texto = ax.text(0.02, 0.98, "", transform=ax.transAxes, va="top", animated=True)
 
 
     total_frames = (ticks // pasos_por_frame) + 1
 
     pedidos_completados = 0
-    completados_prev = set()
-
-    def _avanzar_un_tick():
-        nonlocal visitas, esperas, pedidos_completados, completados_prev
 
-        prev_pos = sim.obtener_posiciones_robots()
-        sim.step()
-        cur_pos = sim.obtener_posiciones_robots()
+    def _avanzar_hasta(target_tick: int):
+        nonlocal pedidos_completados
 
-        for (x, y) in cur_pos:
-            if 0 <= x < ancho and 0 <= y < alto:
-                visitas[y, x] += 1
+        # Todos los ticks del frame de una vez; los heatmaps se acumulan al final
+        sim.step_many(target_tick - sim.tick, visitas, esperas)
 
-        for p0, p1 in zip(prev_pos, cur_pos):
-            if p0 == p1:
-                x, y = p1
-                if 0 <= x < ancho and 0 <= y < alto:
-                    esperas[y, x] += 1
-
-        nuevos = 0
-        for ped in sim.pedidos:
-            if ped.tick_completado is not None and ped.pedido_id not in completados_prev:
-                completados_prev.add(ped.pedido_id)
-                nuevos += 1
-        pedidos_completados += nuevos
+        # Completados del frame, publicados por el simulador
+        pedidos_completados += len(sim.eventos_completado)
+        sim.eventos_completado.clear()
 
     def _redibujar():
-        posiciones_local = sim.obtener_posiciones_robots()
-        xs_local = [p[0] for p in posiciones_local]
-        ys_local = [p[1] for p in posiciones_local]
-        scat.set_offsets(np.c_[xs_local, ys_local])
-
-        estados_local = sim.obtener_estados_robots()
-        cvals_local = [estado_a_val.get(s, 0.0) for s in estados_local]
-        scat.set_array(np.array(cvals_local))
+        scat.set_offsets(sim.pos_robots)
+        scat.set_array(cval_por_codigo[sim.estado_robots])
 
         tick = sim.tick
         pedidos_totales = len(sim.pedidos)
@@ -300,32 +280,74 @@ def animar(
     def update(frame_idx: int):
         # Tick objetivo para este frame (idempotente)
         target_tick = min(ticks, frame_idx * pasos_por_frame)
-        while sim.tick < target_tick:
-            _avanzar_un_tick()
+        if sim.tick < target_tick:
+            _avanzar_hasta(target_tick)
         return _redibujar()
 
-    anim = animation.FuncAnimation(
-        fig,
-        update,
-        frames=total_frames,
-        init_func=init,
-        interval=1000 / fps,
-        blit=False,
-        repeat=False,
-    )
-
     if salida_video.lower().endswith(".gif"):
+        anim = animation.FuncAnimation(
+            fig,
+            update,
+            frames=total_frames,
+            init_func=init,
+            interval=1000 / fps,
+            blit=True,
+            repeat=False,
+        )
         anim.save(salida_video, writer=animation.PillowWriter(fps=fps))
     else:
-        Writer = animation.writers["ffmpeg"]
-        writer = Writer(fps=fps, metadata={"artist": "sim_almacen"}, bitrate=1800)
-        anim.save(salida_video, writer=writer)
+        init()
+        _guardar_video_blit(fig, ax, (scat, texto), update, total_frames, salida_video, fps)
 
     plt.close(fig)
 
     guardar_heatmaps(grid, visitas, esperas, prefijo=prefijo_heatmap)
 
 
+class _EscritorFFMpegBlit(animation.FFMpegWriter):
+    """
+    FFMpegWriter que envía el canvas tal como está, sin fig.savefig por frame
+    (savefig redibuja toda la figura). Quien lo usa debe dejar el canvas al día
+    antes de cada grab_frame.
+    """
+
+    def grab_frame(self, **savefig_kwargs):
+        # _proc (el subproceso ffmpeg con su stdin) es interno de MovieWriter; se
+        # probó con matplotlib 3.11.2. Si una versión lo cambia, se usa el camino
+        # normal del writer (savefig por frame: más lento, mismo video).
+        proc = getattr(self, "_proc", None)
+        if proc is None or getattr(proc, "stdin", None) is None:
+            super().grab_frame(**savefig_kwargs)
+            return
+        proc.stdin.write(self.fig.canvas.buffer_rgba())
+
+
+def _guardar_video_blit(fig, ax, artistas, actualizar, total_frames: int, salida_video: str, fps: int) -> None:
+    """
+    Equivalente a FuncAnimation(..., blit=True).save(...) con ffmpeg, pero con
+    blitting también al guardar (Animation.save siempre redibuja todo): el fondo
+    (layout, zonas, ejes, colorbar) se dibuja una vez y en cada frame solo se
+    restaura y se pintan encima los artistas animados.
+    """
+    writer = _EscritorFFMpegBlit(
+        fps=fps,
+        metadata={"artist": "sim_almacen"},
+        bitrate=1800,
+        # Fondo casi estático: codificación rápida
+        extra_args=["-preset", "ultrafast", "-tune", "stillimage"],
+    )
+    # dpi de la figura: el búfer del canvas coincide con el tamaño de frame del writer
+    with writer.saving(fig, salida_video, dpi=fig.dpi):
+        fig.canvas.draw()
+        fondo = fig.canvas.copy_from_bbox(fig.bbox)
+        for frame_idx in range(total_frames):
+            actualizar(frame_idx)
+            fig.canvas.restore_region(fondo)
+            for artista in artistas:
+                ax.draw_artist(artista)
+            writer.grab_frame()
+
+
 def main():
     ap = argparse.ArgumentParser()
     agregar_argumento_config(ap)
@@ -334,6 +356,22 @@ def main():
     ap.add_argument("--ticks", type=int, default=None)
     ap.add_argument("--pasos_por_frame", type=int, default=None)
     ap.add_argument("--fps", type=int, default=None)
+    ap.add_argument(
+        "--jps",
+        action="store_true",
+        default=None,
+        help="Si se activa, planea las rutas con Jump Point Search en lugar de A*.",
+    )
+    ap.add_argument(
+        "--asignacion",
+        type=str,
+        choices=ASIGNACIONES,
+        default=None,
+        help=(
+            "Asignación de pedidos: greedy con costo Manhattan, greedy con distancia real "
+            "(BFS multi-fuente) o asignación óptima con el algoritmo húngaro (requiere scipy)."
+        ),
+    )
 
     # Escenario base
     ap.add_argument(
@@ -379,9 +417,9 @@ def main():
 
     # Entradas por escenario si no se dieron explícitamente
     ruta_layout = args.layout or _ruta_por_escenario(args.escenario, "layout.npy")
-    ruta_estaciones = args.estaciones or _ruta_por_escenario(args.escenario, "estaciones.json")
-    ruta_anaqueles = args.anaqueles or _ruta_por_escenario(args.escenario, "anaqueles.json")
-    ruta_spawn = args.spawn or _ruta_por_escenario(args.escenario, "spawn.json")
+    ruta_estaciones = args.estaciones or _ruta_por_escenario(args.escenario, "estaciones.npy")
+    ruta_anaqueles = args.anaqueles or _ruta_por_escenario(args.escenario, "anaqueles.npy")
+    ruta_spawn = args.spawn or _ruta_por_escenario(args.escenario, "spawn.npy")
     ruta_pedidos = args.pedidos or _ruta_por_escenario(args.escenario, "pedidos.json")
 
     # Salidas por escenario si no se dieron explícitamente
@@ -407,7 +445,9 @@ def main():
     if args.normalizar_pedidos:
         pedidos = normalizar_ticks_pedidos(pedidos)
 
-    graficar_layout(grid, ruta_layout_png)
+    # Imagen del layout de esta corrida: la comparten el PNG estático y el fondo del video
+    img_layout = imagen_layout(grid)
+    graficar_layout(grid, ruta_layout_png, img=img_layout)
     print(f"[OK] Layout escrito en {ruta_layout_png}")
 
     sim = SimAlmacen(
@@ -418,6 +458,8 @@ def main():
         puntos_spawn=spawns,
         pedidos=pedidos,
         seed=args.seed,
+        usar_jps=bool(args.jps),
+        asignacion=args.asignacion,
     )
 
     animar(
@@ -428,6 +470,7 @@ def main():
         salida_video=ruta_video,
         fps=args.fps,
         prefijo_heatmap=prefijo_heatmap,
+        img_layout=img_layout,
     )
     print(f"[OK] Video escrito en {ruta_video}")
 